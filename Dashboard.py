@@ -1,7 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import io
+
+from chamados.agregacao import agregar
+from chamados.assunto import PALAVRAS_CHAVE
+from chamados.cache import hash_conteudo
+from chamados.graficos import TOP_N_PADRAO
+from chamados.historico import PASTA_HISTORICO, HistoricoParquet
+from chamados.instrumentacao import Medidor, etapa
+from chamados.normalizacao import DIMENSOES
+from chamados.pipeline import TITULOS, ResultadoDashboard, secoes_graficos
+from chamados.preparo import classificar_satelite, preparar_combinado, preparar_historico, preparar_relatorio
+from chamados.relatorio_html import gerar_relatorio_html
 
 # ---------------- CONFIGURAÇÃO ----------------
 st.set_page_config(
@@ -23,12 +32,51 @@ input[type="file"] { background-color: #d9e4f5 !important; color: #000 !importan
 </style>
 """, unsafe_allow_html=True)
 
+# ---------------- INSTRUMENTAÇÃO ----------------
+# Opcional: ?debug=1 na URL ou DESEMPENHO_PAINEL=1 mostram o painel; DESEMPENHO_LOG grava o log;
+# DESEMPENHO_MEMORIA=1 também mede o pico de memória (tracemalloc, deixa o processo mais lento)
+medidor = Medidor.do_ambiente("Dashboard.py", painel=st.query_params.get("debug") == "1")
+
 # ---------------- UPLOAD ----------------
 st.sidebar.header("📂 Importar arquivo CSV")
-uploaded_file = st.sidebar.file_uploader("Selecione o arquivo", type=["csv"])
+uploaded_files = st.sidebar.file_uploader("Selecione o arquivo", type=["csv"], accept_multiple_files=True)
+usar_historico = st.sidebar.checkbox(
+    "Acumular histórico local",
+    help="Grava os chamados em Parquet e abre o histórico acumulado; cada upload só acrescenta o que é novo ou mudou. "
+         "Vale a versão do export mais recente de cada chamado (data estimada pela abertura/fechamento mais recente "
+         "do arquivo), em qualquer ordem de importação; exports com a mesma data seguem a ordem de importação."
+)
+
+# ---------------- CARREGAR RELATÓRIO ----------------
+relatorio = None
+if usar_historico:
+    historicos = {tipo: HistoricoParquet(PASTA_HISTORICO, tipo) for tipo in TITULOS}
+    tipos_upload = set()
+    for arquivo in uploaded_files or []:
+        conteudo = arquivo.getvalue()
+        chave = hash_conteudo(conteudo)
+        # Arquivos já importados nem são lidos de novo
+        ja_importado = [tipo for tipo, historico in historicos.items() if chave in historico.importados()]
+        if ja_importado:
+            tipos_upload.add(ja_importado[0])
+            continue
+        novo = preparar_relatorio(conteudo)
+        gravadas = historicos[novo.tipo].importar(novo.chave, novo.df)
+        tipos_upload.add(novo.tipo)
+        st.sidebar.success(f"{arquivo.name}: {gravadas} chamados novos ou alterados")
+    disponiveis = [tipo for tipo, historico in historicos.items() if historico.existe()]
+    if disponiveis:
+        padrao = next((tipo for tipo in disponiveis if tipo in tipos_upload), disponiveis[0])
+        tipo_historico = st.sidebar.selectbox("Histórico", disponiveis, index=disponiveis.index(padrao))
+        relatorio = preparar_historico(historicos[tipo_historico])
+elif uploaded_files:
+    try:
+        relatorio = preparar_combinado([preparar_relatorio(arquivo.getvalue()) for arquivo in uploaded_files])
+    except ValueError as erro:
+        st.sidebar.error(str(erro))
 
 # ---------------- TELA INICIAL ----------------
-if uploaded_file is None:
+if relatorio is None:
     st.title("📊 Dashboard Chamados")
     st.markdown("""
     <div style="
@@ -50,100 +98,75 @@ if uploaded_file is None:
     st.info("Envie um arquivo CSV para visualizar o dashboard.")
 
 else:
-    df = pd.read_csv(uploaded_file, encoding='latin1', sep=None, engine='python')
-    df.columns = df.columns.str.strip()
-    df = df.fillna("")
+    df = relatorio.df
 
     # ---------------- DETECTAR TIPO DE RELATÓRIO ----------------
-    colunas_consumer = [
-        "Situação", "Assunto", "Data/Hora de abertura", "Criado por",
-        "Causa raiz", "Tipo de registro do caso", "Caso modificado pela última vez por"
-    ]
-    if all(col in df.columns for col in colunas_consumer):
-        relatorio_tipo = "consumer"
-        titulo_dashboard = "📊 Chamados Consumer"
-    else:
-        relatorio_tipo = "enterprise"
-        titulo_dashboard = "📊 Chamados Enterprise"
+    relatorio_tipo = relatorio.tipo
+    titulo_dashboard = TITULOS[relatorio_tipo]
     st.title(titulo_dashboard)
-
-    # ---------------- NORMALIZAÇÃO (CORRIGIDO) ----------------
-    df = df.astype(str).apply(lambda col: col.str.strip())
+    st.sidebar.caption(
+        f"Memória do relatório: {relatorio.memoria_antes/1024**2:.1f} MB → {relatorio.memoria_depois/1024**2:.1f} MB"
+    )
 
     # ---------------- NORMALIZAÇÃO ESPECIAL ONLY CONSUMER ----------------
+    satelite = None
     if relatorio_tipo == "consumer":
-        palavras_chave = ["E65", "63W/T19", "J3"]
-
-        def normaliza_assunto(valor):
-            texto = str(valor).upper()
-            for chave in palavras_chave:
-                if chave in texto:
-                    return chave
-            return "Não informado"
-
-        df["Assunto_Normalizado"] = df["Assunto"].apply(normaliza_assunto)
-
-    # ---------------- FLAG CHAMADOS FECHADOS ----------------
-    if relatorio_tipo == "enterprise":
-        df['Fechado'] = df['Status'].str.lower() == "fechado"
-    else:
-        df['Fechado'] = df['Situação'].str.lower() == "resolvido ou completado"
+        palavras_chave = st.sidebar.text_input("Palavras-chave do Satélite", ", ".join(PALAVRAS_CHAVE))
+        palavras_chave = [chave.strip() for chave in palavras_chave.split(",") if chave.strip()]
+        satelite = classificar_satelite(relatorio, palavras_chave)
+        df = df.assign(Assunto_Normalizado=pd.Categorical.from_codes(*satelite))
 
     # ---------------- FILTROS ----------------
     st.sidebar.header("🔎 Filtros")
+    dimensoes = DIMENSOES[relatorio_tipo]
+    indice = relatorio.indice
     if relatorio_tipo == "enterprise":
-        filtro_aberto = st.sidebar.multiselect("Chamados abertos por usuário", df['Criado por'].unique())
-        filtro_fechado = st.sidebar.multiselect("Chamados fechados por usuário", df['Fechado por'].unique())
-        filtro_categoria = st.sidebar.multiselect("Reclamação", df['Reclamação'].unique())
-        filtro_diag = st.sidebar.multiselect("Diagnóstico", df['Diagnóstico'].unique())
+        filtro_aberto = st.sidebar.multiselect("Chamados abertos por usuário", indice.opcoes(dimensoes["aberto"]))
+        filtro_fechado = st.sidebar.multiselect("Chamados fechados por usuário", indice.opcoes(dimensoes["fechado"]))
+        filtro_categoria = st.sidebar.multiselect("Reclamação", indice.opcoes(dimensoes["categoria"]))
+        filtro_diag = st.sidebar.multiselect("Diagnóstico", indice.opcoes(dimensoes["diagnostico"]))
     else:
-        filtro_aberto = st.sidebar.multiselect("Chamados abertos por usuário", df['Criado por'].unique())
-        filtro_fechado = st.sidebar.multiselect("Chamados fechados por usuário", df['Caso modificado pela última vez por'].unique())
-        filtro_categoria = st.sidebar.multiselect("Assunto", df['Assunto'].unique())
-        filtro_diag = st.sidebar.multiselect("Causa Raiz", df['Causa raiz'].unique())
+        filtro_aberto = st.sidebar.multiselect("Chamados abertos por usuário", indice.opcoes(dimensoes["aberto"]))
+        filtro_fechado = st.sidebar.multiselect("Chamados fechados por usuário", indice.opcoes(dimensoes["fechado"]))
+        filtro_categoria = st.sidebar.multiselect("Assunto", indice.opcoes(dimensoes["categoria"]))
+        filtro_diag = st.sidebar.multiselect("Causa Raiz", indice.opcoes(dimensoes["diagnostico"]))
+
+    opcoes_top_n = ["Todas", 10, 20, TOP_N_PADRAO, 50, 100]
+    top_n = st.sidebar.selectbox(
+        "Barras por gráfico", opcoes_top_n, index=opcoes_top_n.index(TOP_N_PADRAO),
+        help="As demais entram em uma barra \"Outros\"; as tabelas continuam completas."
+    )
+    top_n = None if top_n == "Todas" else top_n
 
     # ---------------- APLICAR FILTROS ----------------
-    df_filtrado = df.copy()
-    if filtro_aberto:
-        df_filtrado = df_filtrado[df_filtrado['Criado por'].isin(filtro_aberto)]
-    if filtro_fechado:
-        col_fechado = 'Fechado por' if relatorio_tipo=="enterprise" else 'Caso modificado pela última vez por'
-        df_filtrado = df_filtrado[df_filtrado[col_fechado].isin(filtro_fechado)]
-    if filtro_categoria:
-        col_categoria = 'Reclamação' if relatorio_tipo=="enterprise" else 'Assunto'
-        df_filtrado = df_filtrado[df_filtrado[col_categoria].isin(filtro_categoria)]
-    if filtro_diag:
-        col_diag = 'Diagnóstico' if relatorio_tipo=="enterprise" else 'Causa raiz'
-        df_filtrado = df_filtrado[df_filtrado[col_diag].isin(filtro_diag)]
+    with etapa("filtros") as registro:
+        mascara = indice.mascara({
+            dimensoes["aberto"]: filtro_aberto,
+            dimensoes["fechado"]: filtro_fechado,
+            dimensoes["categoria"]: filtro_categoria,
+            dimensoes["diagnostico"]: filtro_diag,
+        })
+        df_filtrado = df if mascara is None else df[mascara]
+        registro.linhas = len(df_filtrado)
+
+    # ---------------- AGREGAÇÕES ----------------
+    tempos = df["TempoAtendimentoMin"].to_numpy() if "TempoAtendimentoMin" in df.columns else None
+    with etapa("agregacao"):
+        agregados = agregar(indice, dimensoes, df["Fechado"].to_numpy(), mascara, satelite=satelite, tempos=tempos)
 
     # ---------------- MÉTRICAS ----------------
-    total_chamados = len(df_filtrado)
-    total_abertos = len(df_filtrado[~df_filtrado['Fechado']])
-    total_fechados = df_filtrado['Fechado'].sum()
-    pct_abertos = (total_abertos/total_chamados*100) if total_chamados else 0
-    pct_fechados = (total_fechados/total_chamados*100) if total_chamados else 0
-
-    if relatorio_tipo == "enterprise" and 'Data de abertura' in df_filtrado.columns and 'Hora de abertura' in df_filtrado.columns:
-        df_enc = df_filtrado[df_filtrado['Fechado']].copy()
-        if not df_enc.empty:
-            df_enc['DataHoraAbertura'] = pd.to_datetime(df_enc['Data de abertura'] + ' ' + df_enc['Hora de abertura'], errors='coerce')
-            df_enc['DataHoraFechamento'] = pd.to_datetime(df_enc['Data de fechamento'] + ' ' + df_enc['Hora de fechamento'], errors='coerce')
-            df_enc['TempoAtendimentoMin'] = ((df_enc['DataHoraFechamento'] - df_enc['DataHoraAbertura']).dt.total_seconds()/60).clip(lower=0)
-            tempo_medio = round(df_enc['TempoAtendimentoMin'].mean(),2)
-        else:
-            tempo_medio = 0.0
-    else:
-        tempo_medio = 0.0
-
-    campo_ofensor = 'Causa raiz' if relatorio_tipo=="consumer" else 'Diagnóstico'
-    df_valid_ofensor = df_filtrado[df_filtrado[campo_ofensor]!=""]
-    if not df_valid_ofensor.empty:
-        cont_ofensor = df_valid_ofensor[campo_ofensor].value_counts()
-        maior_ofensor = cont_ofensor.idxmax()
-        qtd_ofensor = cont_ofensor.max()
-        pct_ofensor = round(qtd_ofensor / len(df_valid_ofensor) * 100, 2)
-    else:
-        maior_ofensor, qtd_ofensor, pct_ofensor = "-",0,0.0
+    total_chamados = agregados.total
+    total_abertos = agregados.abertos
+    total_fechados = agregados.fechados
+    pct_abertos = agregados.pct_abertos
+    pct_fechados = agregados.pct_fechados
+
+    sla = agregados.sla
+    tempo_medio = sla.media if sla is not None else 0.0
+
+    maior_ofensor = agregados.maior_ofensor
+    qtd_ofensor = agregados.qtd_ofensor
+    pct_ofensor = agregados.pct_ofensor
 
     # ---------------- MÉTRICAS NA TELA ----------------
     col1, col2, col3 = st.columns(3)
@@ -151,105 +174,105 @@ else:
     col2.metric("📌 Maior ofensor", f"{maior_ofensor}")
     col3.metric("📊 % dos chamados do maior ofensor", f"{pct_ofensor}%  ({qtd_ofensor})")
 
+    if sla is not None:
+        with st.expander("⏱ Tempo de atendimento (SLA)"):
+            s1, s2, s3 = st.columns(3)
+            s1.metric("Mediana (min)", f"{sla.mediana:.2f}")
+            s2.metric("P90 (min)", f"{sla.p90:.2f}")
+            s3.metric("P95 (min)", f"{sla.p95:.2f}")
+            if agregados.sla_por_usuario is not None:
+                st.markdown("**Por usuário que fechou**")
+                st.dataframe(agregados.sla_por_usuario, hide_index=True)
+            if agregados.sla_por_diagnostico is not None:
+                st.markdown("**Por diagnóstico**")
+                st.dataframe(agregados.sla_por_diagnostico, hide_index=True)
+
     st.write(f"### 📑 Total de chamados: **{total_chamados}**")
     st.write(f"🔵 Chamados abertos: {total_abertos} ({pct_abertos:.1f}%)")
     st.write(f"🔴 Chamados fechados: {total_fechados} ({pct_fechados:.1f}%)")
 
     # ---------------- FUNÇÃO GRÁFICO ----------------
-    def grafico_com_tabela(df_graf, coluna, titulo, icone="📁"):
-        df_graf = df_graf[df_graf[coluna].notna() & (df_graf[coluna]!="")]
-        if df_graf.empty:
-            st.info(f"Nenhum dado para {titulo}")
-            return None,None
-        tabela = df_graf.groupby(coluna).size().reset_index(name="Qtd de Chamados")
-        tabela['% do Total'] = (tabela['Qtd de Chamados']/tabela['Qtd de Chamados'].sum()*100).round(2)
-        st.subheader(f"{icone} {titulo}")
+    def grafico_com_tabela(secao):
+        if secao.tabela is None:
+            st.info(f"Nenhum dado para {secao.titulo}")
+            return None
+        st.subheader(f"{secao.icone} {secao.titulo}")
         col_table, col_graph = st.columns([1.4,3])
         with col_table:
-            st.dataframe(tabela, height=550)
-        fig = px.bar(tabela, x=coluna, y="Qtd de Chamados", text="Qtd de Chamados",
-                     color="Qtd de Chamados", color_continuous_scale="Blues", template="plotly_white")
-        fig.update_traces(textposition="outside", marker_line_color="black", marker_line_width=1)
+            st.dataframe(secao.tabela, height=secao.altura)
+        with etapa(f"figura: {secao.titulo}") as registro:
+            fig = secao.grafico()
+            registro.linhas = len(secao.tabela)
         with col_graph:
             st.plotly_chart(fig, use_container_width=True)
-        return fig, tabela
-
-    # ---------------- GRÁFICOS NORMAIS ----------------
-    fig_abertos, tab_abertos = grafico_com_tabela(df_filtrado, "Criado por", "Chamados abertos por usuário", icone="🔵")
-    col_fechado = 'Fechado por' if relatorio_tipo=="enterprise" else 'Caso modificado pela última vez por'
-    df_fechados = df_filtrado[df_filtrado['Fechado'] & (df_filtrado[col_fechado]!="")]
-    fig_fechados, tab_fechados = grafico_com_tabela(df_fechados, col_fechado, "Chamados fechados por usuário", icone="🔴")
-    col_categoria = 'Reclamação' if relatorio_tipo=="enterprise" else 'Assunto'
-    titulo_categoria = 'Reclamação' if relatorio_tipo=="enterprise" else 'Assunto'
-    fig_categoria, tab_categoria = grafico_com_tabela(df_filtrado[df_filtrado[col_categoria]!=""], col_categoria, titulo_categoria, icone="📌")
-    col_diag = 'Diagnóstico' if relatorio_tipo=="enterprise" else 'Causa raiz'
-    titulo_diag = 'Diagnóstico' if relatorio_tipo=="enterprise" else 'Causa Raiz'
-    fig_diag, tab_diag = grafico_com_tabela(df_filtrado[df_filtrado[col_diag]!=""], col_diag, titulo_diag, icone="📌")
-
-    # ---------------- GRÁFICO ESPECIAL CONSUMER ----------------
-    if relatorio_tipo == "consumer":
-        st.subheader("🛰️ Satélite")
+        return fig
 
-        df_chaves = df_filtrado.copy()
-        df_chaves["Assunto_Normalizado"] = df_chaves["Assunto"].apply(normaliza_assunto)
+    # ---------------- GRÁFICOS ----------------
+    # Inclui o gráfico especial "Satélite" nos relatórios consumer
+    secoes = secoes_graficos(relatorio_tipo, agregados, top_n)
+    for secao in secoes:
+        secao.fig = grafico_com_tabela(secao)
 
-        tabela_chaves = df_chaves["Assunto_Normalizado"].value_counts().reset_index()
-        tabela_chaves.columns = ["Assunto", "Qtd"]
-        tabela_chaves["% do Total"] = (tabela_chaves["Qtd"] / tabela_chaves["Qtd"].sum() * 100).round(2)
+    # ---------------- DOWNLOAD HTML COMPLETO ----------------
+    # O HTML só é gerado quando o botão é clicado
+    def baixar_html():
+        # Roda fora do rerun, por isso mede direto no medidor e grava à parte
+        with medidor.etapa("exportacao_html") as registro:
+            arquivo = gerar_relatorio_html(titulo_dashboard, agregados, secoes, df_filtrado)
+            registro.linhas = len(df_filtrado)
+        medidor.gravar_log(evento="exportacao_html")
+        return arquivo
 
-        col_t, col_g = st.columns([1.4, 3])
-        with col_t:
-            st.dataframe(tabela_chaves, height=300)
+    # ---------------- DOWNLOAD PDF / PNG ----------------
+    # Gráficos renderizados pelo kaleido uma vez e reaproveitados (cache pela tabela agregada).
+    # Sem Chrome no servidor o PDF sai só com as tabelas e o ZIP de PNGs fica desabilitado
+    from chamados.imagens import RenderizacaoIndisponivel, chrome_disponivel
 
-        fig_chaves = px.bar(
-            tabela_chaves,
-            x="Assunto",
-            y="Qtd",
-            text="Qtd",
-            color="Qtd",
-            color_continuous_scale="Blues",
-            template="plotly_white"
-        )
-        fig_chaves.update_traces(textposition="outside", marker_line_color="black", marker_line_width=1)
+    com_graficos = chrome_disponivel()
 
-        with col_g:
-            st.plotly_chart(fig_chaves, use_container_width=True)
+    def baixar_pdf():
+        from chamados.exportacao import gerar_pdf
 
-    # ---------------- DOWNLOAD HTML COMPLETO ----------------
-    def to_html_bonito():
-        buffer = io.StringIO()
-        buffer.write("<html><head><meta charset='utf-8'><title>{}</title>".format(titulo_dashboard))
-        buffer.write("<style>body{font-family:Arial;background:#f0f4f8;margin:20px;}h1,h2{color:#000;}table{border-collapse:collapse;width:100%;margin:10px 0;}th,td{border:1px solid #ccc;padding:5px;background:#fafafa;}th{background:#e2e2e2;} .metric{font-weight:bold;margin:5px 0;}</style>")
-        buffer.write("</head><body>")
-        buffer.write(f"<h1>{titulo_dashboard}</h1>")
-        buffer.write(f"<div class='metric'>Total de chamados: {total_chamados}</div>")
-        buffer.write(f"<div class='metric'>Chamados abertos: {total_abertos} ({pct_abertos:.1f}%)</div>")
-        buffer.write(f"<div class='metric'>Chamados fechados: {total_fechados} ({pct_fechados:.1f}%)</div>")
-        buffer.write(f"<div class='metric'>Maior ofensor: {maior_ofensor} ({pct_ofensor}%)</div>")
-
-        for titulo, tabela, fig in [
-            ("Chamados abertos por usuário", tab_abertos, fig_abertos),
-            ("Chamados fechados por usuário", tab_fechados, fig_fechados),
-            (titulo_categoria, tab_categoria, fig_categoria),
-            (titulo_diag, tab_diag, fig_diag)
-        ]:
-            if tabela is not None and fig is not None:
-                buffer.write(f"<h2>{titulo}</h2>")
-                buffer.write("<div style='display:flex; gap:40px; align-items:flex-start;'>")
-                buffer.write("<div style='width:45%;'>{}</div>".format(tabela.to_html(index=False)))
-                buffer.write("<div style='width:55%;'>{}</div>".format(fig.to_html(full_html=False, include_plotlyjs='cdn')))
-                buffer.write("</div>")
-
-        if relatorio_tipo == "consumer":
-            buffer.write("<h2>Satélite</h2>")
-            buffer.write("<div style='display:flex; gap:40px; align-items:flex-start;'>")
-            buffer.write("<div style='width:45%;'>{}</div>".format(tabela_chaves.to_html(index=False)))
-            buffer.write("<div style='width:55%;'>{}</div>".format(fig_chaves.to_html(full_html=False, include_plotlyjs='cdn')))
-            buffer.write("</div>")
-
-        buffer.write("<h2>Tabela completa filtrada</h2>")
-        buffer.write(df_filtrado.to_html(index=False))
-        buffer.write("</body></html>")
-        return buffer.getvalue().encode("utf-8")
-
-    st.download_button("📥 Baixar Dashboard Completo", data=to_html_bonito(), file_name="dashboard.html", mime="text/html")
+        with medidor.etapa("exportacao_pdf") as registro:
+            resultado = ResultadoDashboard(relatorio, titulo_dashboard, agregados, df_filtrado, secoes)
+            try:
+                arquivo = gerar_pdf(resultado, com_graficos=com_graficos)
+            except RenderizacaoIndisponivel:
+                arquivo = gerar_pdf(resultado, com_graficos=False)
+            registro.linhas = len(df_filtrado)
+        medidor.gravar_log(evento="exportacao_pdf")
+        return arquivo
+
+    def baixar_pngs():
+        from chamados.imagens import zip_pngs
+
+        with medidor.etapa("exportacao_png"):
+            arquivo = zip_pngs(secoes)
+        medidor.gravar_log(evento="exportacao_png")
+        return arquivo
+
+    col_html, col_pdf, col_png = st.columns(3)
+    col_html.download_button(
+        "📥 Baixar Dashboard Completo",
+        data=baixar_html,
+        file_name="dashboard.html",
+        mime="text/html"
+    )
+    col_pdf.download_button(
+        "📄 Baixar PDF",
+        data=baixar_pdf,
+        file_name="dashboard.pdf",
+        mime="application/pdf",
+        help=None if com_graficos else "Sem Chrome no servidor: o PDF sai só com as tabelas."
+    )
+    col_png.download_button(
+        "🖼️ Baixar gráficos (PNG)",
+        data=baixar_pngs,
+        file_name="graficos.zip",
+        mime="application/zip",
+        disabled=not com_graficos,
+        help=None if com_graficos else "Precisa do Chrome no servidor (rode plotly_get_chrome)."
+    )
+
+# ---------------- DESEMPENHO ----------------
+medidor.finalizar(st.sidebar, tipo=relatorio.tipo if relatorio is not None else None)
@@ -0,0 +1 @@
+"""Rotinas de processamento dos relatórios de chamados usadas pelo Dashboard.py."""
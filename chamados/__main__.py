@@ -0,0 +1,5 @@
+import sys
+
+from chamados.cli import main
+
+sys.exit(main())
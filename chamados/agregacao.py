@@ -0,0 +1,138 @@
+"""Agregações de métricas e gráficos calculadas em uma passada.
+
+Trabalha direto sobre os vetores de códigos do ``IndiceFiltros``: cada
+dimensão vira um ``np.bincount`` sobre as linhas selecionadas, sem montar
+sub-frames nem refiltrar strings vazias a cada gráfico.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from chamados.filtros import IndiceFiltros
+from chamados.sla import ResumoSLA, resumo_sla, sla_por
+
+
+@dataclass
+class Agregados:
+    total: int
+    abertos: int
+    fechados: int
+    pct_abertos: float
+    pct_fechados: float
+    maior_ofensor: str
+    qtd_ofensor: int
+    pct_ofensor: float
+    # Dimensão ("aberto", "fechado", ...) -> tabela do gráfico, ou None se vazia
+    tabelas: dict = field(default_factory=dict)
+    satelite: pd.DataFrame | None = None
+    # Só para relatórios com tempo de atendimento (enterprise)
+    sla: ResumoSLA | None = None
+    sla_por_usuario: pd.DataFrame | None = None
+    sla_por_diagnostico: pd.DataFrame | None = None
+
+
+def tabela_contagens(coluna: str, valores: np.ndarray, contagens: np.ndarray) -> pd.DataFrame | None:
+    presentes = np.flatnonzero(contagens)
+    if not len(presentes):
+        return None
+    tabela = pd.DataFrame({coluna: valores[presentes], "Qtd de Chamados": contagens[presentes]})
+    tabela = tabela.sort_values(coluna, kind="stable").reset_index(drop=True)
+    tabela["% do Total"] = (tabela["Qtd de Chamados"] / tabela["Qtd de Chamados"].sum() * 100).round(2)
+    return tabela
+
+
+def ordem_por_frequencia(codigos_selecionados: np.ndarray, contagens: np.ndarray) -> np.ndarray:
+    """Códigos presentes do mais para o menos frequente.
+
+    Empates ficam na ordem de primeira aparição, como no ``value_counts``.
+    """
+    vistos = pd.unique(codigos_selecionados)
+    return vistos[np.argsort(-contagens[vistos], kind="stable")]
+
+
+def _selecionar(indice: IndiceFiltros, coluna: str, selecao: np.ndarray) -> np.ndarray:
+    codigos = indice.codigos(coluna)
+    # Valores vazios não entram nos gráficos nem no maior ofensor
+    validos = selecao & (codigos >= 0)
+    vazio = indice.codigo(coluna, "")
+    if vazio >= 0:
+        validos &= codigos != vazio
+    return codigos[validos]
+
+
+def agregar(indice: IndiceFiltros, dimensoes: dict, fechado: np.ndarray,
+            mascara: np.ndarray | None = None, satelite=None, tempos: np.ndarray | None = None) -> Agregados:
+    """Calcula totais, maior ofensor e as tabelas de todos os gráficos.
+
+    ``dimensoes`` mapeia o nome da dimensão para a coluna (ver
+    ``normalizacao.DIMENSOES``); ``satelite``, quando informado, é um par
+    ``(codigos, rotulos)`` já classificado por linha; ``tempos`` é o tempo de
+    atendimento em minutos por linha (NaN quando não há).
+    """
+    selecao = np.ones(indice.n_linhas, dtype=bool) if mascara is None else mascara
+    fechado = np.asarray(fechado, dtype=bool)
+
+    total = int(selecao.sum())
+    fechados = int((selecao & fechado).sum())
+    abertos = total - fechados
+
+    tabelas = {}
+    ofensor = None
+    for dimensao, coluna in dimensoes.items():
+        if coluna not in indice.colunas:
+            tabelas[dimensao] = None
+            continue
+        # O gráfico de fechados só considera chamados fechados
+        base = selecao & fechado if dimensao == "fechado" else selecao
+        selecionados = _selecionar(indice, coluna, base)
+        contagens = np.bincount(selecionados, minlength=len(indice.categorias(coluna)))
+        tabelas[dimensao] = tabela_contagens(coluna, indice.categorias(coluna), contagens)
+        if dimensao == "diagnostico" and len(selecionados):
+            ofensor = coluna, selecionados, contagens
+
+    if ofensor is not None:
+        coluna, selecionados, contagens = ofensor
+        codigo = ordem_por_frequencia(selecionados, contagens)[0]
+        maior_ofensor = indice.categorias(coluna)[codigo]
+        qtd_ofensor = int(contagens[codigo])
+        pct_ofensor = round(qtd_ofensor / len(selecionados) * 100, 2)
+    else:
+        maior_ofensor, qtd_ofensor, pct_ofensor = "-", 0, 0.0
+
+    tabela_satelite = None
+    if satelite is not None:
+        codigos, rotulos = satelite
+        selecionados = codigos[selecao]
+        contagens = np.bincount(selecionados, minlength=len(rotulos))
+        presentes = ordem_por_frequencia(selecionados, contagens)
+        tabela_satelite = pd.DataFrame({
+            "Assunto": np.asarray(rotulos, dtype=object)[presentes],
+            "Qtd": contagens[presentes],
+        })
+        tabela_satelite["% do Total"] = (tabela_satelite["Qtd"] / tabela_satelite["Qtd"].sum() * 100).round(2)
+
+    sla = sla_usuario = sla_diagnostico = None
+    if tempos is not None:
+        encerrados = selecao & fechado
+        sla = resumo_sla(tempos[encerrados])
+        if "fechado" in dimensoes and dimensoes["fechado"] in indice.colunas:
+            sla_usuario = sla_por(indice, dimensoes["fechado"], tempos, encerrados)
+        if "diagnostico" in dimensoes and dimensoes["diagnostico"] in indice.colunas:
+            sla_diagnostico = sla_por(indice, dimensoes["diagnostico"], tempos, encerrados)
+
+    return Agregados(
+        total=total,
+        abertos=abertos,
+        fechados=fechados,
+        pct_abertos=(abertos / total * 100) if total else 0,
+        pct_fechados=(fechados / total * 100) if total else 0,
+        maior_ofensor=maior_ofensor,
+        qtd_ofensor=qtd_ofensor,
+        pct_ofensor=pct_ofensor,
+        tabelas=tabelas,
+        satelite=tabela_satelite,
+        sla=sla,
+        sla_por_usuario=sla_usuario,
+        sla_por_diagnostico=sla_diagnostico,
+    )
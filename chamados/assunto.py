@@ -0,0 +1,56 @@
+"""Classificação do Assunto dos relatórios consumer por palavra-chave.
+
+A busca usa uma única regex compilada com todas as palavras-chave e roda uma
+vez por valor distinto de Assunto; o resultado volta para as linhas pelos
+códigos do ``IndiceFiltros``.
+"""
+import re
+
+import numpy as np
+
+from chamados.filtros import IndiceFiltros
+
+PALAVRAS_CHAVE = ["E65", "63W/T19", "J3"]
+SEM_CHAVE = "Não informado"
+
+
+class ClassificadorAssunto:
+    """Devolve a primeira palavra-chave da lista contida no texto.
+
+    A prioridade é a ordem da lista, não a posição no texto. O lookahead faz
+    a regex enxergar ocorrências sobrepostas, e como as alternativas estão em
+    ordem de prioridade basta pegar a menor prioridade encontrada.
+
+    A busca ignora maiúsculas: texto e palavras-chave são comparados em
+    maiúsculas, mas os rótulos mantêm a grafia digitada.
+    """
+
+    def __init__(self, palavras_chave=PALAVRAS_CHAVE):
+        # Chaves que só diferem na caixa contam uma vez, com a grafia da primeira
+        unicas = {}
+        for chave in palavras_chave:
+            if chave != SEM_CHAVE:
+                unicas.setdefault(chave.upper(), chave)
+        self.palavras_chave = list(unicas.values())
+        self.rotulos = self.palavras_chave + [SEM_CHAVE]
+        self._prioridade = {chave: i for i, chave in enumerate(unicas)}
+        alternativas = "|".join(re.escape(chave) for chave in unicas)
+        self._padrao = re.compile(f"(?=({alternativas}))") if alternativas else None
+
+    def codigo(self, valor) -> int:
+        sem_chave = len(self.palavras_chave)
+        if self._padrao is None:
+            return sem_chave
+        texto = str(valor).upper()
+        return min((self._prioridade[m.group(1)] for m in self._padrao.finditer(texto)), default=sem_chave)
+
+    def classificar(self, valor) -> str:
+        return self.rotulos[self.codigo(valor)]
+
+    def codigos_por_indice(self, indice: IndiceFiltros, coluna: str = "Assunto") -> np.ndarray:
+        """Código da palavra-chave de cada linha, calculado por valor distinto."""
+        por_valor = np.fromiter(
+            (self.codigo(valor) for valor in indice.categorias(coluna)),
+            dtype=np.int32, count=len(indice.categorias(coluna))
+        )
+        return por_valor[indice.codigos(coluna)]
@@ -0,0 +1,182 @@
+"""Benchmark das etapas do dashboard sobre relatórios sintéticos.
+
+Mede separadamente leitura do CSV, normalização, índice/filtros,
+classificação do Satélite (só consumer), agregação, construção das figuras
+e exportação HTML, sem passar pelos caches. O tempo é a mediana das repetições; o pico de memória de cada etapa
+vem de uma passada extra com ``tracemalloc`` (que deixa tudo mais lento e
+por isso não entra na medição de tempo). O ``tracemalloc`` não enxerga
+buffers do Arrow, então o pico de RSS do processo também é registrado.
+
+Uso::
+
+    python -m chamados.benchmark -n 10000 100000 --json atual.json --comparar anterior.json
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from chamados import relatorio_html
+from chamados.agregacao import agregar
+from chamados.assunto import PALAVRAS_CHAVE, ClassificadorAssunto
+from chamados.filtros import IndiceFiltros
+from chamados.graficos import TOP_N_PADRAO, construir_grafico
+from chamados.ingestao import ler_csv
+from chamados.normalizacao import DIMENSOES, normalizar
+from chamados.pipeline import TITULOS, secoes_graficos
+from chamados.sintetico import GERADORES, gerar_csv
+
+# "satelite" só existe nos relatórios consumer
+ETAPAS = ["leitura", "normalizacao", "filtros", "satelite", "agregacao", "figuras", "html"]
+
+
+def executar_etapas(conteudo: bytes, medir):
+    """Roda o pipeline chamando ``medir(etapa, funcao)`` em cada etapa."""
+    df = medir("leitura", lambda: ler_csv(conteudo))
+    normalizado = medir("normalizacao", lambda: normalizar(df))
+    tipo = normalizado.tipo
+    dimensoes = DIMENSOES[tipo]
+
+    def filtrar():
+        indice = IndiceFiltros(normalizado.df, dimensoes.values())
+        # Filtro típico: os três usuários mais comuns
+        coluna = dimensoes["aberto"]
+        return indice, indice.mascara({coluna: indice.opcoes(coluna)[:3]})
+
+    indice, mascara = medir("filtros", filtrar)
+    fechado = normalizado.df["Fechado"].to_numpy()
+    tempos = normalizado.df["TempoAtendimentoMin"].to_numpy() if "TempoAtendimentoMin" in normalizado.df else None
+    satelite = None
+    if tipo == "consumer":
+        def classificar():
+            classificador = ClassificadorAssunto(PALAVRAS_CHAVE)
+            return classificador.codigos_por_indice(indice, "Assunto"), classificador.rotulos
+
+        satelite = medir("satelite", classificar)
+    agregados = medir("agregacao", lambda: agregar(indice, dimensoes, fechado, mascara, satelite=satelite, tempos=tempos))
+
+    def figuras():
+        secoes = secoes_graficos(tipo, agregados, TOP_N_PADRAO)
+        for secao in secoes:
+            if secao.tabela is not None:
+                secao.fig = construir_grafico(secao.tabela, secao.x, secao.y, secao.top_n)
+        return secoes
+
+    secoes = medir("figuras", figuras)
+
+    def html():
+        tamanho = 0
+
+        def escrever(texto):
+            nonlocal tamanho
+            tamanho += len(texto)
+
+        relatorio_html.escrever_relatorio(escrever, TITULOS[tipo], agregados, secoes, normalizado.df[mascara])
+        return tamanho
+
+    # Sem isso, da 2ª repetição em diante o HTML das figuras viria do cache
+    relatorio_html._cache_figuras.limpar()
+    return medir("html", html)
+
+
+def medir_tempos(conteudo: bytes, repeticoes: int) -> dict:
+    tempos = {}
+
+    def medir(etapa, funcao):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.setdefault(etapa, []).append(time.perf_counter() - inicio)
+        return resultado
+
+    for _ in range(repeticoes):
+        executar_etapas(conteudo, medir)
+    return {etapa: statistics.median(valores) for etapa, valores in tempos.items()}
+
+
+def medir_memoria(conteudo: bytes) -> dict:
+    picos = {}
+
+    def medir(etapa, funcao):
+        tracemalloc.reset_peak()
+        atual = tracemalloc.get_traced_memory()[0]
+        resultado = funcao()
+        picos[etapa] = tracemalloc.get_traced_memory()[1] - atual
+        return resultado
+
+    tracemalloc.start()
+    try:
+        executar_etapas(conteudo, medir)
+    finally:
+        tracemalloc.stop()
+    return picos
+
+
+def pico_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rodar(tipos, linhas, repeticoes: int = 3, semente: int = 0) -> list[dict]:
+    resultados = []
+    for tipo in tipos:
+        for n in linhas:
+            conteudo = gerar_csv(tipo, n, semente)
+            tempos = medir_tempos(conteudo, repeticoes)
+            picos = medir_memoria(conteudo)
+            resultados.append({
+                "tipo": tipo, "linhas": n, "bytes": len(conteudo),
+                "tempo_s": tempos, "pico_mb": {etapa: pico / 1024**2 for etapa, pico in picos.items()},
+                "rss_max_mb": pico_rss_mb(),
+            })
+            imprimir(resultados[-1])
+    return resultados
+
+
+def imprimir(resultado: dict, anterior: dict | None = None):
+    print(f"\n{resultado['tipo']} - {resultado['linhas']:,} linhas ({resultado['bytes'] / 1024**2:.1f} MB)")
+    print(f"  {'etapa':<14}{'tempo (s)':>12}{'pico (MB)':>12}" + (f"{'Δ tempo':>10}" if anterior else ""))
+    for etapa in ETAPAS:
+        if etapa not in resultado["tempo_s"]:
+            continue
+        tempo = resultado["tempo_s"][etapa]
+        linha = f"  {etapa:<14}{tempo:>12.4f}{resultado['pico_mb'][etapa]:>12.1f}"
+        if anterior:
+            base = anterior["tempo_s"].get(etapa)
+            linha += f"{(tempo / base - 1) * 100:>+9.1f}%" if base else f"{'-':>10}"
+        print(linha)
+    print(f"  {'total':<14}{sum(resultado['tempo_s'].values()):>12.4f}")
+    if resultado.get("rss_max_mb"):
+        print(f"  RSS máximo do processo até aqui: {resultado['rss_max_mb']:.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m chamados.benchmark", description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--linhas", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("-t", "--tipos", nargs="+", choices=list(GERADORES), default=list(GERADORES))
+    parser.add_argument("-r", "--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="grava os resultados neste arquivo")
+    parser.add_argument("--comparar", type=Path, help="resultado anterior (JSON) para comparar")
+    args = parser.parse_args(argv)
+
+    resultados = rodar(args.tipos, args.linhas, args.repeticoes, args.semente)
+    if args.comparar:
+        anteriores = {(r["tipo"], r["linhas"]): r for r in json.loads(args.comparar.read_text())}
+        print("\n=== Comparação com", args.comparar, "===")
+        for resultado in resultados:
+            imprimir(resultado, anteriores.get((resultado["tipo"], resultado["linhas"])))
+    if args.json:
+        args.json.write_text(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark de partida a frio dos dois apps Streamlit.
+
+Cada cenário roda em um interpretador novo (como em um contêiner recém
+criado) e mede o tempo para importar o Streamlit e para a primeira execução
+do script na tela inicial: o ``Dashboard.py`` sem upload e o
+``dashboard/app.py`` com um SQLite local vazio. Também confere que nenhuma
+biblioteca pesada que a tela inicial não usa foi importada.
+
+O processo sai com código 1 se algum cenário passar do orçamento de tempo ou
+carregar uma biblioteca proibida, para poder rodar na CI.
+
+Uso::
+
+    python -m chamados.benchmark_partida -r 5 --orcamento 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+ORCAMENTO_S = 1.5
+# Bibliotecas que só os gráficos e as exportações devem carregar
+PESADAS = ["plotly.express", "altair", "supabase", "fpdf", "kaleido", "weasyprint", "xlsxwriter", "openpyxl"]
+CENARIOS = {
+    "Dashboard.py": {"script": RAIZ / "Dashboard.py", "ambiente": {}},
+    "dashboard/app.py": {"script": RAIZ / "dashboard" / "app.py", "ambiente": {"ARMAZENAMENTO": "sqlite"}},
+}
+
+_MEDICAO = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importado = time.perf_counter()
+app = AppTest.from_file({script!r}, default_timeout=60)
+app.run()
+fim = time.perf_counter()
+print(json.dumps({{
+    "import_streamlit_s": importado - inicio,
+    "primeira_execucao_s": fim - importado,
+    "erros": [str(erro.value) for erro in app.exception],
+    "pesadas": [modulo for modulo in {pesadas!r} if modulo in sys.modules],
+}}))
+"""
+
+
+def medir_cenario(script: Path, ambiente: dict) -> dict:
+    with tempfile.TemporaryDirectory() as pasta:
+        # Banco e espelho vazios em pasta temporária: nada de rede nem dados locais
+        env = {**os.environ, "REGISTROS_SQLITE": str(Path(pasta) / "registros.sqlite"),
+               "ESPELHO_REGISTROS": str(Path(pasta) / "espelho.sqlite"), **ambiente}
+        codigo = _MEDICAO.format(script=str(script), pesadas=PESADAS)
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=script.parent, env=env,
+                               capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def rodar(repeticoes: int = 3) -> dict:
+    resultados = {}
+    for nome, cenario in CENARIOS.items():
+        medicoes = [medir_cenario(cenario["script"], cenario["ambiente"]) for _ in range(repeticoes)]
+        resultados[nome] = {
+            "import_streamlit_s": statistics.median(m["import_streamlit_s"] for m in medicoes),
+            "primeira_execucao_s": statistics.median(m["primeira_execucao_s"] for m in medicoes),
+            "erros": medicoes[-1]["erros"],
+            "pesadas": medicoes[-1]["pesadas"],
+        }
+    return resultados
+
+
+def verificar(resultados: dict, orcamento: float) -> list[str]:
+    problemas = []
+    for nome, resultado in resultados.items():
+        total = resultado["import_streamlit_s"] + resultado["primeira_execucao_s"]
+        if total > orcamento:
+            problemas.append(f"{nome}: {total:.2f}s acima do orçamento de {orcamento:.2f}s")
+        if resultado["pesadas"]:
+            problemas.append(f"{nome}: importou {', '.join(resultado['pesadas'])} na tela inicial")
+        if resultado["erros"]:
+            problemas.append(f"{nome}: erro na execução: {resultado['erros'][0]}")
+    return problemas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m chamados.benchmark_partida", description=__doc__.splitlines()[0])
+    parser.add_argument("-r", "--repeticoes", type=int, default=3)
+    parser.add_argument("--orcamento", type=float, default=ORCAMENTO_S, help="segundos até a tela inicial")
+    parser.add_argument("--json", type=Path, help="grava os resultados neste arquivo")
+    args = parser.parse_args(argv)
+
+    resultados = rodar(args.repeticoes)
+    print(f"{'app':<20}{'streamlit (s)':>15}{'1ª execução (s)':>18}{'total (s)':>12}")
+    for nome, resultado in resultados.items():
+        total = resultado["import_streamlit_s"] + resultado["primeira_execucao_s"]
+        print(f"{nome:<20}{resultado['import_streamlit_s']:>15.3f}{resultado['primeira_execucao_s']:>18.3f}{total:>12.3f}")
+    if args.json:
+        args.json.write_text(json.dumps(resultados, indent=2))
+
+    problemas = verificar(resultados, args.orcamento)
+    for problema in problemas:
+        print("FALHOU", problema, file=sys.stderr)
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Cache LRU em memória compartilhado entre os reruns do Streamlit."""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def hash_conteudo(conteudo: bytes) -> str:
+    """Chave estável para o conteúdo de um upload."""
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+def hash_tabela(tabela: pd.DataFrame) -> str:
+    """Chave de uma tabela agregada: muda se mudar qualquer valor ou coluna."""
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update("\x1f".join(map(str, tabela.columns)).encode("utf-8"))
+    resumo.update(pd.util.hash_pandas_object(tabela, index=False).to_numpy().tobytes())
+    return resumo.hexdigest()
+
+
+class CacheLRU:
+    """Dicionário limitado que descarta a entrada menos usada ao estourar.
+
+    O Streamlit atende cada sessão em uma thread, por isso todo acesso é
+    protegido por lock.
+    """
+
+    def __init__(self, max_entradas: int = 4):
+        self.max_entradas = max_entradas
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            if chave not in self._dados:
+                return padrao
+            self._dados.move_to_end(chave)
+            return self._dados[chave]
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def obter_ou_calcular(self, chave, funcao):
+        valor = self.get(chave)
+        if valor is None:
+            valor = funcao()
+            self.put(chave, valor)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __contains__(self, chave):
+        with self._lock:
+            return chave in self._dados
+
+    def __len__(self):
+        with self._lock:
+            return len(self._dados)
@@ -0,0 +1,81 @@
+"""Geração em lote dos relatórios a partir de uma pasta de CSVs.
+
+Uso::
+
+    python -m chamados exports/ -o relatorios/ --xlsx --pdf -j 4
+
+``--pdf-graficos`` põe os gráficos no PDF (precisa do Chrome do kaleido).
+
+Cada CSV é processado em um processo separado e gera ``<nome>.html`` (e,
+opcionalmente, ``.xlsx``/``.pdf``) na pasta de saída.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+
+def processar_arquivo(caminho: Path, saida: Path, xlsx: bool = False, pdf: bool = False,
+                      top_n: int | None = None, graficos_pdf: bool = False) -> tuple[int, float]:
+    """Gera os relatórios de um CSV; devolve ``(linhas, segundos)``."""
+    from chamados.exportacao import gerar_pdf, gerar_xlsx
+    from chamados.graficos import TOP_N_PADRAO
+    from chamados.pipeline import executar
+    from chamados.relatorio_html import escrever_relatorio
+
+    inicio = time.perf_counter()
+    # None usa o padrão; 0 mostra todas as barras
+    resultado = executar(caminho.read_bytes(), top_n=TOP_N_PADRAO if top_n is None else top_n or None)
+    destino = saida / caminho.stem
+    with open(destino.with_suffix(".html"), "w", encoding="utf-8") as arquivo:
+        escrever_relatorio(arquivo.write, resultado.titulo, resultado.agregados, resultado.secoes, resultado.df_filtrado)
+    if xlsx:
+        gerar_xlsx(resultado, destino.with_suffix(".xlsx"))
+    if pdf:
+        gerar_pdf(resultado, destino.with_suffix(".pdf"), com_graficos=graficos_pdf)
+    return len(resultado.df_filtrado), time.perf_counter() - inicio
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m chamados", description="Gera os dashboards de uma pasta de CSVs.")
+    parser.add_argument("entrada", type=Path, help="pasta com os CSVs exportados")
+    parser.add_argument("-o", "--saida", type=Path, help="pasta de destino (padrão: a própria pasta de entrada)")
+    parser.add_argument("--xlsx", action="store_true", help="também gera a planilha XLSX")
+    parser.add_argument("--pdf", action="store_true", help="também gera o PDF")
+    parser.add_argument("--pdf-graficos", action="store_true",
+                        help="gera o PDF com os gráficos (precisa do Chrome: rode plotly_get_chrome)")
+    parser.add_argument("--top-n", type=int, help="barras por gráfico, as demais viram \"Outros\" (padrão: 30; 0 = todas)")
+    parser.add_argument("-j", "--processos", type=int, default=os.cpu_count(), help="número de processos em paralelo")
+    args = parser.parse_args(argv)
+
+    arquivos = sorted(args.entrada.glob("*.csv"))
+    if not arquivos:
+        print(f"Nenhum CSV encontrado em {args.entrada}", file=sys.stderr)
+        return 1
+    if args.pdf_graficos:
+        from chamados.imagens import chrome_disponivel
+
+        if not chrome_disponivel():
+            print("--pdf-graficos precisa do Chrome: rode `plotly_get_chrome` uma vez (ou use só --pdf)", file=sys.stderr)
+            return 1
+    saida = args.saida or args.entrada
+    saida.mkdir(parents=True, exist_ok=True)
+
+    inicio = time.perf_counter()
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.processos or 1, len(arquivos)))) as executor:
+        futuros = {executor.submit(processar_arquivo, caminho, saida, args.xlsx, args.pdf or args.pdf_graficos,
+                                   args.top_n, args.pdf_graficos): caminho for caminho in arquivos}
+        for futuro in as_completed(futuros):
+            caminho = futuros[futuro]
+            try:
+                linhas, segundos = futuro.result()
+            except Exception as erro:
+                falhas += 1
+                print(f"ERRO  {caminho.name}: {erro}", file=sys.stderr)
+            else:
+                print(f"ok    {caminho.name}: {linhas} linhas em {segundos:.2f}s")
+    print(f"{len(arquivos) - falhas}/{len(arquivos)} arquivos em {time.perf_counter() - inicio:.2f}s")
+    return 1 if falhas else 0
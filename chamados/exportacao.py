@@ -0,0 +1,109 @@
+"""Exportação do resultado do dashboard em XLSX e PDF.
+
+O HTML fica em ``chamados.relatorio_html``; os gráficos do PDF vêm de
+``chamados.imagens``.
+"""
+import io
+import math
+from pathlib import Path
+
+import pandas as pd
+
+from chamados.cache import CacheLRU
+from chamados.graficos import agrupar_top_n, chave_grafico
+from chamados.imagens import imagem_secao
+from chamados.pipeline import ResultadoDashboard
+
+# Fontes padrão do PDF só cobrem latin-1 (sem emojis)
+_LATIN1 = "latin-1"
+
+_cache_pdfs = CacheLRU(max_entradas=8)
+
+
+def gerar_xlsx(resultado: ResultadoDashboard, destino):
+    agregados = resultado.agregados
+    resumo = pd.DataFrame({
+        "Indicador": ["Total de chamados", "Chamados abertos", "Chamados fechados", "Maior ofensor", "% do maior ofensor"],
+        "Valor": [agregados.total, agregados.abertos, agregados.fechados, agregados.maior_ofensor, agregados.pct_ofensor],
+    })
+    with pd.ExcelWriter(destino, engine="xlsxwriter") as writer:
+        resumo.to_excel(writer, sheet_name="Resumo", index=False)
+        for secao in resultado.secoes:
+            if secao.tabela is not None:
+                # Nomes de aba do Excel: até 31 caracteres, sem "/"
+                secao.tabela.to_excel(writer, sheet_name=secao.titulo.replace("/", "-")[:31], index=False)
+        resultado.df_filtrado.to_excel(writer, sheet_name="Dados", index=False)
+
+
+def _texto_pdf(valor) -> str:
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ""
+    return str(valor).encode(_LATIN1, "ignore").decode(_LATIN1).strip()
+
+
+def _chave_pdf(resultado: ResultadoDashboard, com_graficos: bool) -> tuple:
+    agregados = resultado.agregados
+    indicadores = (agregados.total, agregados.abertos, agregados.fechados, agregados.maior_ofensor, agregados.pct_ofensor)
+    tabelas = tuple(
+        chave_grafico(secao.tabela, secao.x, secao.y, secao.top_n)
+        for secao in resultado.secoes if secao.tabela is not None
+    )
+    return resultado.titulo, indicadores, tabelas, com_graficos
+
+
+def _montar_pdf(resultado: ResultadoDashboard, com_graficos: bool) -> bytes:
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def footer(self):
+            self.set_y(-12)
+            self.set_font("Helvetica", size=8)
+            self.cell(0, 8, f"{self.page_no()}/{{nb}}", align="C")
+
+    agregados = resultado.agregados
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, _texto_pdf(resultado.titulo), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=11)
+    for linha in (
+        f"Total de chamados: {agregados.total}",
+        f"Chamados abertos: {agregados.abertos} ({agregados.pct_abertos:.1f}%)",
+        f"Chamados fechados: {agregados.fechados} ({agregados.pct_fechados:.1f}%)",
+        f"Maior ofensor: {agregados.maior_ofensor} ({agregados.pct_ofensor}%)",
+    ):
+        pdf.cell(0, 7, _texto_pdf(linha), new_x="LMARGIN", new_y="NEXT")
+
+    for secao in resultado.secoes:
+        if secao.tabela is None or secao.tabela.empty:
+            continue
+        # Uma seção por página: gráfico e, abaixo, a mesma tabela do gráfico
+        pdf.add_page()
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.cell(0, 9, _texto_pdf(secao.titulo), new_x="LMARGIN", new_y="NEXT")
+        if com_graficos:
+            pdf.image(io.BytesIO(imagem_secao(secao)), w=pdf.epw)
+            pdf.ln(2)
+        tabela_secao = agrupar_top_n(secao.tabela, secao.x, secao.y, secao.top_n) if secao.top_n else secao.tabela
+        pdf.set_font("Helvetica", size=9)
+        larguras = (3,) + (1,) * (len(tabela_secao.columns) - 1)
+        with pdf.table(col_widths=larguras, text_align=("LEFT",) + ("RIGHT",) * (len(larguras) - 1)) as tabela:
+            tabela.row([_texto_pdf(col) for col in tabela_secao.columns])
+            for valores in tabela_secao.itertuples(index=False):
+                tabela.row([_texto_pdf(valor) for valor in valores])
+    return bytes(pdf.output())
+
+
+def gerar_pdf(resultado: ResultadoDashboard, destino=None, com_graficos: bool = False) -> bytes:
+    """PDF paginado com indicadores e tabelas de cada seção (e os gráficos, se pedidos).
+
+    Fica em cache pelas tabelas agregadas, então exportar de novo o mesmo
+    filtro não monta nada. Grava em ``destino`` se informado. Os gráficos
+    precisam do Chrome; sem ele levanta ``imagens.RenderizacaoIndisponivel``.
+    """
+    conteudo = _cache_pdfs.obter_ou_calcular(_chave_pdf(resultado, com_graficos),
+                                             lambda: _montar_pdf(resultado, com_graficos))
+    if destino is not None:
+        Path(destino).write_bytes(conteudo)
+    return conteudo
@@ -0,0 +1,71 @@
+"""Índice de filtros montado uma vez por upload.
+
+Cada coluna filtrável é guardada como um vetor de códigos inteiros. Aplicar
+um multiselect vira uma consulta a uma tabela booleana indexada pelo código,
+e os filtros são combinados por interseção das máscaras, sem copiar o frame.
+"""
+import numpy as np
+import pandas as pd
+
+
+class IndiceFiltros:
+
+    def __init__(self, df: pd.DataFrame, colunas):
+        self.n_linhas = len(df)
+        self._codigos = {}
+        self._categorias = {}
+        self._valores = {}
+        self._opcoes = {}
+        for col in colunas:
+            if col not in df.columns:
+                continue
+            serie = df[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                codigos = serie.cat.codes.to_numpy()
+                valores = serie.cat.categories
+            else:
+                codigos, valores = pd.factorize(serie)
+            self._codigos[col] = codigos
+            self._categorias[col] = np.asarray(valores, dtype=object)
+            self._valores[col] = {valor: i for i, valor in enumerate(valores)}
+            # Mesma ordem de primeira aparição que o .unique() usava
+            self._opcoes[col] = [valores[i] for i in pd.unique(codigos) if i >= 0]
+
+    @property
+    def colunas(self):
+        return self._codigos.keys()
+
+    def opcoes(self, coluna: str) -> list:
+        return self._opcoes.get(coluna, [])
+
+    def codigos(self, coluna: str) -> np.ndarray:
+        return self._codigos[coluna]
+
+    def categorias(self, coluna: str) -> np.ndarray:
+        """Valor correspondente a cada código de ``coluna``."""
+        return self._categorias[coluna]
+
+    def codigo(self, coluna: str, valor) -> int:
+        return self._valores[coluna].get(valor, -1)
+
+    def mascara_coluna(self, coluna: str, selecionados) -> np.ndarray:
+        mapa = self._valores[coluna]
+        permitidos = np.zeros(len(mapa) + 1, dtype=bool)
+        for valor in selecionados:
+            if valor in mapa:
+                permitidos[mapa[valor]] = True
+        # O código -1 (valor ausente) cai na última posição, sempre False
+        return permitidos[self._codigos[coluna]]
+
+    def mascara(self, selecoes: dict) -> np.ndarray | None:
+        """Máscara das linhas que passam em todos os filtros preenchidos.
+
+        Retorna ``None`` quando nenhum filtro está ativo.
+        """
+        resultado = None
+        for coluna, selecionados in selecoes.items():
+            if not selecionados:
+                continue
+            parcial = self.mascara_coluna(coluna, selecionados)
+            resultado = parcial if resultado is None else resultado & parcial
+        return resultado
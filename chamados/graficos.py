@@ -0,0 +1,58 @@
+"""Construção das figuras Plotly do dashboard.
+
+Colunas como ``Criado por`` e ``Reclamação`` chegam a milhares de valores
+distintos. Com ``top_n`` o gráfico mostra só as ``top_n`` barras mais altas
+e soma o resto em uma barra "Outros"; a tabela ao lado continua completa.
+Acima de ``LIMITE_ROTULOS`` barras os rótulos e contornos de cada barra são
+omitidos, porque pesam mais no JSON enviado ao navegador do que os próprios
+dados. As figuras ficam em cache pela tabela agregada, então um rerun que
+não muda a tabela não reconstrói o gráfico.
+"""
+import pandas as pd
+
+from chamados.cache import CacheLRU, hash_tabela
+
+OUTROS = "Outros"
+TOP_N_PADRAO = 30
+LIMITE_ROTULOS = 60
+
+_cache_figuras = CacheLRU(max_entradas=32)
+
+
+def agrupar_top_n(tabela: pd.DataFrame, x: str, y: str, top_n: int) -> pd.DataFrame:
+    """Mantém as ``top_n`` linhas com maior ``y`` (na ordem original) e soma o resto em "Outros"."""
+    if len(tabela) <= top_n:
+        return tabela
+    # Empates ficam com a primeira linha, como no sort estável
+    manter = tabela[y].rank(method="first", ascending=False) <= top_n
+    outros = {col: None for col in tabela.columns}
+    outros[x] = OUTROS
+    outros[y] = tabela.loc[~manter, y].sum()
+    if "% do Total" in tabela.columns:
+        outros["% do Total"] = round(outros[y] / tabela[y].sum() * 100, 2)
+    return pd.concat([tabela[manter], pd.DataFrame([outros])], ignore_index=True)
+
+
+def chave_grafico(tabela: pd.DataFrame, x: str, y: str, top_n: int | None = None) -> tuple:
+    return hash_tabela(tabela), x, y, top_n
+
+
+def construir_grafico(tabela, x, y, top_n=None):
+    """Figura sem passar pelo cache."""
+    # Importado só aqui: a tela inicial do dashboard não precisa do plotly.express
+    import plotly.express as px
+
+    if top_n:
+        tabela = agrupar_top_n(tabela, x, y, top_n)
+    poucas_barras = len(tabela) <= LIMITE_ROTULOS
+    fig = px.bar(tabela, x=x, y=y, text=y if poucas_barras else None,
+                 color=y, color_continuous_scale="Blues", template="plotly_white")
+    if poucas_barras:
+        fig.update_traces(textposition="outside", marker_line_color="black", marker_line_width=1)
+    return fig
+
+
+def grafico_barras(tabela, x, y, top_n=None):
+    """Figura em cache; não deve ser alterada no lugar."""
+    return _cache_figuras.obter_ou_calcular(chave_grafico(tabela, x, y, top_n),
+                                            lambda: construir_grafico(tabela, x, y, top_n))
@@ -0,0 +1,239 @@
+"""Junção de vários relatórios e histórico local em Parquet.
+
+Os exports diários se sobrepõem; os chamados são identificados pelo ``Id``
+(enterprise) ou pelo ``Número do caso`` (consumer). Sem essa coluna, o
+consumer só descarta linhas idênticas, já que não há como saber se duas
+linhas diferentes são versões do mesmo caso.
+
+Quando o mesmo chamado aparece em mais de um relatório vale a versão do
+export mais recente. Os exports não trazem a data em que foram tirados, então
+ela é estimada pela abertura ou fechamento mais recente do arquivo
+(``data_export``) e guardada em cada linha na coluna ``DataExport``. Assim
+reimportar um export antigo não volta chamados para um estado velho, e um
+chamado reaberto aparece aberto. Só entre exports com a mesma data vale a
+ordem de importação.
+
+O histórico fica em uma pasta por tipo de relatório, com um arquivo Parquet
+por importação contendo só as linhas novas ou alteradas. Chamados que
+voltam iguais em um export mais novo não são regravados: só a chave, o hash
+da linha e a nova data vão para um arquivo ``confirmacao-*``, para que um
+export intermediário importado depois não passe na frente deles. Na leitura
+as partes são concatenadas, as confirmações sobem a data das versões que
+confirmam e vale a versão do export mais recente de cada chamado; quando há
+arquivos demais eles são compactados em uma parte só. Partes gravadas antes
+da ``DataExport`` usam a data estimada das próprias linhas.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chamados.cache import hash_conteudo
+from chamados.normalizacao import COLUNAS_CONSUMER, COLUNAS_USADAS, compactar
+from chamados.sla import converter_texto_data_hora
+
+CHAVES = {"enterprise": ["Id"], "consumer": ["Número do caso"]}
+MAX_PARTES = 30
+PASTA_HISTORICO = Path(os.environ.get("CHAMADOS_HISTORICO", Path(__file__).resolve().parent.parent / "historico"))
+COLUNAS_USADAS_TODAS = set(COLUNAS_USADAS["enterprise"]) | set(COLUNAS_USADAS["consumer"])
+COLUNA_EXPORT = "DataExport"
+COLUNA_HASH = "HashLinha"
+# Datas de cada tipo que indicam até quando o export vai
+COLUNAS_DATA = {"enterprise": ["DataHoraAbertura", "DataHoraFechamento"], "consumer": ["Data/Hora de abertura"]}
+
+
+def colunas_chave(df: pd.DataFrame, tipo: str) -> list[str]:
+    chave = [col for col in CHAVES[tipo] if col in df.columns]
+    if not chave and tipo == "consumer":
+        chave = [col for col in COLUNAS_CONSUMER if col in df.columns]
+    return chave
+
+
+def _chave_preenchida(df: pd.DataFrame, chave: list[str]) -> pd.Series:
+    preenchida = pd.Series(True, index=df.index)
+    for col in chave:
+        preenchida &= df[col].astype(str) != ""
+    return preenchida
+
+
+def data_export(df: pd.DataFrame, tipo: str) -> pd.Timestamp:
+    """Abertura ou fechamento mais recente do relatório (NaT sem datas)."""
+    maiores = []
+    for col in COLUNAS_DATA[tipo]:
+        if col not in df.columns:
+            continue
+        datas = df[col] if pd.api.types.is_datetime64_any_dtype(df[col]) else converter_texto_data_hora(df[col])
+        maiores.append(datas.max())
+    maiores = [data for data in maiores if pd.notna(data)]
+    return max(maiores) if maiores else pd.NaT
+
+
+def com_data_export(df: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    """``df`` com a coluna ``DataExport``; sem ela, o relatório inteiro é tratado como um export só."""
+    if COLUNA_EXPORT in df.columns:
+        return df
+    return df.assign(**{COLUNA_EXPORT: pd.Series(data_export(df, tipo), index=df.index, dtype="datetime64[ns]")})
+
+
+def recencia(df: pd.DataFrame) -> np.ndarray:
+    """``DataExport`` de cada linha em ns; sem data fica antes de todas."""
+    if COLUNA_EXPORT not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return df[COLUNA_EXPORT].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def deduplicar(df: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    """Mantém a versão do export mais recente de cada chamado (empate: a última); linhas sem chave ficam todas."""
+    chave = colunas_chave(df, tipo)
+    if not chave:
+        return df
+    # Ordenação estável: entre exports da mesma data continua valendo a última linha
+    ordem = np.argsort(recencia(df), kind="stable")
+    repetido = np.empty(len(df), dtype=bool)
+    repetido[ordem] = df.iloc[ordem].duplicated(chave, keep="last").to_numpy()
+    repetido &= _chave_preenchida(df, chave).to_numpy()
+    return df[~repetido]
+
+
+def _juntar(frames: list[pd.DataFrame], tipo: str, confirmacoes: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Concatena relatórios (cada um um export) e deduplica, mantendo a ``DataExport``."""
+    df = pd.concat([com_data_export(frame, tipo) for frame in frames], ignore_index=True)
+    chave = colunas_chave(df, tipo)
+    if confirmacoes is not None and chave:
+        df = _aplicar_confirmacoes(df, confirmacoes, chave)
+    return deduplicar(df, tipo).reset_index(drop=True)
+
+
+def _aplicar_confirmacoes(df: pd.DataFrame, confirmacoes: pd.DataFrame, chave: list[str]) -> pd.DataFrame:
+    """Sobe a ``DataExport`` das versões que um export mais novo trouxe iguais."""
+    maiores = confirmacoes.groupby(chave + [COLUNA_HASH])[COLUNA_EXPORT].max()
+    linhas = pd.MultiIndex.from_frame(df[chave].astype(str).assign(**{COLUNA_HASH: hash_linhas(df)}))
+    posicoes = maiores.index.get_indexer(linhas)
+    confirmada = posicoes >= 0
+    datas = df[COLUNA_EXPORT].to_numpy(dtype="datetime64[ns]").copy()
+    datas[confirmada] = np.fmax(datas[confirmada], maiores.to_numpy(dtype="datetime64[ns]")[posicoes[confirmada]])
+    return df.assign(**{COLUNA_EXPORT: datas})
+
+
+def mesclar(frames: list[pd.DataFrame], tipo: str) -> pd.DataFrame:
+    """Concatena relatórios normalizados do mesmo tipo, sem chamados repetidos."""
+    df = _juntar(frames, tipo).drop(columns=COLUNA_EXPORT)
+    # Categóricos com categorias diferentes viram texto no concat
+    return compactar(df, COLUNAS_USADAS[tipo])
+
+
+def hash_linhas(df: pd.DataFrame) -> np.ndarray:
+    # Só as colunas do CSV; as derivadas (datas, Fechado) dependem delas
+    colunas = [col for col in df.columns if col in COLUNAS_USADAS_TODAS]
+    return pd.util.hash_pandas_object(df[colunas].astype(str), index=False).to_numpy()
+
+
+class HistoricoParquet:
+    """Histórico acumulado de um tipo de relatório em ``pasta/<tipo>/``."""
+
+    def __init__(self, pasta, tipo: str):
+        self.tipo = tipo
+        self.pasta = Path(pasta) / tipo
+        self._manifesto = self.pasta / "importados.json"
+
+    def partes(self) -> list[Path]:
+        return sorted(self.pasta.glob("parte-*.parquet"))
+
+    def confirmacoes(self) -> list[Path]:
+        return sorted(self.pasta.glob("confirmacao-*.parquet"))
+
+    def versao(self) -> str:
+        """Muda sempre que uma parte ou confirmação é adicionada ou compactada."""
+        return hash_conteudo("|".join(p.name for p in self.partes() + self.confirmacoes()).encode("utf-8"))
+
+    def existe(self) -> bool:
+        return bool(self.partes())
+
+    def importados(self) -> set[str]:
+        if not self._manifesto.exists():
+            return set()
+        return set(json.loads(self._manifesto.read_text(encoding="utf-8")))
+
+    def _versoes(self) -> pd.DataFrame | None:
+        """Versão vigente de cada chamado, ainda com a ``DataExport``."""
+        partes = self.partes()
+        if not partes:
+            return None
+        arquivos = self.confirmacoes()
+        confirmacoes = pd.concat([pd.read_parquet(arquivo) for arquivo in arquivos], ignore_index=True) if arquivos else None
+        return _juntar([pd.read_parquet(parte) for parte in partes], self.tipo, confirmacoes)
+
+    def carregar(self) -> pd.DataFrame | None:
+        versoes = self._versoes()
+        if versoes is None:
+            return None
+        return compactar(versoes.drop(columns=COLUNA_EXPORT), COLUNAS_USADAS[self.tipo])
+
+    def importar(self, chave_arquivo: str, df: pd.DataFrame) -> int:
+        """Acrescenta as linhas novas/alteradas de um relatório normalizado.
+
+        Arquivos já importados (mesmo hash) são ignorados, assim como linhas
+        de um export mais antigo que o da versão já gravada. Devolve quantas
+        linhas foram gravadas.
+        """
+        importados = self.importados()
+        if chave_arquivo in importados:
+            return 0
+
+        atual = self._versoes()
+        novos = deduplicar(com_data_export(df, self.tipo), self.tipo)
+        chave = colunas_chave(novos, self.tipo)
+        confirmados = None
+        if atual is not None and chave and len(novos):
+            # Compara o conteúdo de cada chamado com a versão já gravada;
+            # linhas sem chave não têm com o que comparar e sempre entram
+            atual = atual[_chave_preenchida(atual, chave)]
+            conhecidos = pd.MultiIndex.from_frame(atual[chave].astype(str))
+            posicoes = conhecidos.get_indexer(pd.MultiIndex.from_frame(novos[chave].astype(str)))
+            hashes_novos = hash_linhas(novos)
+            conhecido = posicoes >= 0
+            iguais = conhecido & (hash_linhas(atual)[posicoes] == hashes_novos)
+            recencia_novos, recencia_atual = recencia(novos), recencia(atual)[posicoes]
+            mais_novo = recencia_novos > recencia_atual
+            # Mesma data: vale a ordem de importação, então a linha entra
+            obsoletos = conhecido & ~iguais & (recencia_novos < recencia_atual)
+            preenchida = _chave_preenchida(novos, chave).to_numpy()
+            confirmados = novos[chave].astype(str)[iguais & mais_novo & preenchida].assign(**{
+                COLUNA_HASH: hashes_novos[iguais & mais_novo & preenchida],
+                COLUNA_EXPORT: novos[COLUNA_EXPORT][iguais & mais_novo & preenchida],
+            })
+            novos = novos[~(iguais | obsoletos) | ~preenchida]
+
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        if len(novos):
+            numero = len(self.partes()) + 1
+            novos.reset_index(drop=True).to_parquet(self.pasta / f"parte-{numero:06d}-{chave_arquivo}.parquet", index=False)
+        if confirmados is not None and len(confirmados):
+            numero = len(self.confirmacoes()) + 1
+            confirmados.reset_index(drop=True).to_parquet(
+                self.pasta / f"confirmacao-{numero:06d}-{chave_arquivo}.parquet", index=False)
+        importados.add(chave_arquivo)
+        self._manifesto.write_text(json.dumps(sorted(importados)), encoding="utf-8")
+
+        if len(self.partes()) + len(self.confirmacoes()) > MAX_PARTES:
+            self.compactar()
+        return len(novos)
+
+    def compactar(self):
+        partes = self.partes()
+        confirmacoes = self.confirmacoes()
+        if len(partes) <= 1 and not confirmacoes:
+            return
+        df = self._versoes()
+        arquivos = partes + confirmacoes
+        destino = self.pasta / f"parte-{1:06d}-{hash_conteudo(b''.join(p.name.encode() for p in arquivos))}.parquet"
+        temporario = destino.with_suffix(".tmp")
+        df.to_parquet(temporario, index=False)
+        # Primeiro a parte compactada entra no lugar, depois saem as antigas:
+        # se cair no meio, sobram partes repetidas, que a leitura deduplica
+        temporario.replace(destino)
+        for arquivo in arquivos:
+            if arquivo != destino:
+                arquivo.unlink()
@@ -0,0 +1,136 @@
+"""Renderização estática (PNG) das figuras com o kaleido.
+
+O kaleido desenha as figuras em um Chrome sem interface. Sem servidor
+aberto, cada ``to_image`` sobe e derruba um navegador; aqui o servidor é
+aberto uma vez por processo e reaproveitado em todas as exportações. As
+imagens ficam em cache pela chave do gráfico (hash da tabela agregada e
+``top_n``), então exportar de novo o mesmo filtro não renderiza nada.
+
+O kaleido precisa de um Chrome instalado; em uma máquina nova rode uma vez
+``plotly_get_chrome``. Sem ele (ou se o servidor morrer) as funções daqui
+levantam ``RenderizacaoIndisponivel`` em vez de travar: a thread do servidor
+do kaleido morre calada e ``to_image`` ficaria esperando para sempre.
+"""
+import atexit
+import io
+import queue
+import re
+import threading
+import zipfile
+
+from chamados.cache import CacheLRU
+from chamados.graficos import chave_grafico
+
+LARGURA = 1000
+ALTURA = 500
+ESCALA = 2
+TEMPO_LIMITE_S = 60
+
+_cache_imagens = CacheLRU(max_entradas=64)
+# O servidor do kaleido tem uma única fila de pedidos e de respostas para o
+# processo todo: duas renderizações ao mesmo tempo poderiam trocar as imagens
+_lock_renderizador = threading.Lock()
+_servidor_aberto = False
+_falha = None
+
+
+class RenderizacaoIndisponivel(RuntimeError):
+    """Não há como gerar PNG neste processo (sem Chrome ou servidor parado)."""
+
+
+def chrome_disponivel() -> bool:
+    """Se o kaleido acha um Chrome (o baixado por ``plotly_get_chrome`` ou o do sistema)."""
+    try:
+        from choreographer.browsers.chromium import Chromium
+    except ImportError:
+        return False
+    return Chromium.find_browser(skip_local=False) is not None
+
+
+def _servidor_vivo() -> bool:
+    import kaleido
+
+    # O kaleido não expõe a thread do servidor; se ela morreu, os pedidos
+    # ficam na fila sem ninguém para atender
+    thread = getattr(kaleido._global_server, "_thread", None)
+    return kaleido._global_server.is_running() and thread is not None and thread.is_alive()
+
+
+def _iniciar_renderizador():
+    """Abre o servidor do kaleido se ainda não estiver aberto; chamar com o lock."""
+    global _servidor_aberto, _falha
+    if _falha is not None:
+        raise RenderizacaoIndisponivel(_falha)
+    if not _servidor_aberto:
+        if not chrome_disponivel():
+            raise RenderizacaoIndisponivel("Chrome não encontrado; rode `plotly_get_chrome` uma vez nesta máquina.")
+        import kaleido
+
+        kaleido.start_sync_server(silence_warnings=True)
+        atexit.register(kaleido.stop_sync_server, silence_warnings=True)
+        _servidor_aberto = True
+    if not _servidor_vivo():
+        _falha = "O servidor do kaleido parou (o Chrome não abriu ou caiu)."
+        raise RenderizacaoIndisponivel(_falha)
+
+
+def _com_tempo_limite(funcao, segundos: float):
+    """Roda ``funcao`` em uma thread à parte e desiste depois de ``segundos``."""
+    resultado = queue.Queue(maxsize=1)
+
+    def rodar():
+        try:
+            resultado.put((True, funcao()))
+        except BaseException as erro:
+            resultado.put((False, erro))
+
+    threading.Thread(target=rodar, daemon=True).start()
+    try:
+        ok, valor = resultado.get(timeout=segundos)
+    except queue.Empty:
+        raise TimeoutError from None
+    if not ok:
+        raise valor
+    return valor
+
+
+def imagem_png(fig, chave, largura: int = LARGURA, altura: int = ALTURA) -> bytes:
+    """PNG da figura, em cache por ``chave`` (ver ``graficos.chave_grafico``) e tamanho."""
+
+    def renderizar():
+        global _falha
+        import plotly.io as pio
+
+        with _lock_renderizador:
+            _iniciar_renderizador()
+            try:
+                return _com_tempo_limite(
+                    lambda: pio.to_image(fig, format="png", width=largura, height=altura, scale=ESCALA),
+                    TEMPO_LIMITE_S,
+                )
+            except TimeoutError:
+                # A thread presa continua na fila do servidor: não dá para reaproveitá-lo
+                _falha = f"O kaleido não respondeu em {TEMPO_LIMITE_S}s."
+                raise RenderizacaoIndisponivel(_falha) from None
+
+    return _cache_imagens.obter_ou_calcular((chave, largura, altura), renderizar)
+
+
+def imagem_secao(secao, largura: int = LARGURA, altura: int = ALTURA) -> bytes:
+    return imagem_png(secao.grafico(), chave_grafico(secao.tabela, secao.x, secao.y, secao.top_n), largura, altura)
+
+
+def _nome_arquivo(titulo: str) -> str:
+    return re.sub(r"[^\w-]+", "_", titulo, flags=re.UNICODE).strip("_").lower() or "grafico"
+
+
+def zip_pngs(secoes) -> bytes:
+    """Um PNG por seção com gráfico, dentro de um ZIP."""
+    buffer = io.BytesIO()
+    # PNG já é comprimido; ZIP_STORED evita gastar CPU à toa
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as arquivo:
+        for numero, secao in enumerate(secoes, start=1):
+            if secao.tabela is None:
+                continue
+            arquivo.writestr(f"{numero:02d}_{_nome_arquivo(secao.titulo)}.png", imagem_secao(secao))
+    return buffer.getvalue()
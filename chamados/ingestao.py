@@ -0,0 +1,60 @@
+"""Leitura dos relatórios CSV exportados do sistema de chamados.
+
+O separador e a codificação são detectados uma única vez sobre um trecho
+inicial do arquivo; o restante é lido pelo parser em C do pandas, com todas
+as colunas como texto. O cache por upload fica em ``chamados.preparo``.
+"""
+import csv
+import io
+
+import pandas as pd
+
+AMOSTRA_BYTES = 64 * 1024
+SEPARADORES = ";,\t|"
+
+
+def detectar_encoding(amostra: bytes) -> str:
+    # Os relatórios costumam vir em latin1; só usamos utf-8 quando o trecho
+    # tem acentos que decodificam corretamente nessa codificação.
+    if amostra.isascii():
+        return "latin1"
+    try:
+        amostra.decode("utf-8")
+    except UnicodeDecodeError as erro:
+        # Um caractere multibyte cortado no fim da amostra não conta como erro
+        if erro.start < len(amostra) - 3:
+            return "latin1"
+    return "utf-8-sig"
+
+
+def detectar_separador(texto: str) -> str:
+    linhas = texto.splitlines()[:50]
+    # A última linha da amostra pode estar incompleta
+    amostra = "\n".join(linhas[:-1] if len(linhas) > 1 else linhas)
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=SEPARADORES).delimiter
+    except csv.Error:
+        cabecalho = linhas[0] if linhas else ""
+        return max(SEPARADORES, key=cabecalho.count)
+
+
+def detectar_formato(conteudo: bytes) -> tuple[str, str]:
+    """Retorna ``(separador, encoding)`` a partir do início do arquivo."""
+    amostra = conteudo[:AMOSTRA_BYTES]
+    encoding = detectar_encoding(amostra)
+    texto = amostra.decode(encoding, errors="ignore")
+    return detectar_separador(texto), encoding
+
+
+def ler_csv(conteudo: bytes) -> pd.DataFrame:
+    separador, encoding = detectar_formato(conteudo)
+    opcoes = dict(sep=separador, dtype=str, na_filter=False, engine="c")
+    try:
+        df = pd.read_csv(io.BytesIO(conteudo), encoding=encoding, **opcoes)
+    except UnicodeDecodeError:
+        if encoding == "latin1":
+            raise
+        df = pd.read_csv(io.BytesIO(conteudo), encoding="latin1", **opcoes)
+    df.columns = df.columns.str.strip()
+    return df
+
@@ -0,0 +1,115 @@
+"""Normalização do relatório lido do CSV.
+
+Mantém só as colunas que o dashboard usa, remove espaços das bordas e guarda
+os campos de baixa cardinalidade (usuários, reclamação, diagnóstico...) como
+categóricos, o que reduz bastante a memória e acelera ``isin``/``groupby``.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from chamados.sla import adicionar_tempo_atendimento
+
+COLUNAS_CONSUMER = [
+    "Situação", "Assunto", "Data/Hora de abertura", "Criado por",
+    "Causa raiz", "Tipo de registro do caso", "Caso modificado pela última vez por"
+]
+COLUNAS_ENTERPRISE = [
+    "Status", "Criado por", "Fechado por", "Reclamação", "Diagnóstico",
+    "Data de abertura", "Hora de abertura", "Data de fechamento", "Hora de fechamento", "Id"
+]
+# Mantidas quando existem no arquivo, mas não obrigatórias
+COLUNAS_OPCIONAIS = {"consumer": ["Número do caso"], "enterprise": []}
+COLUNAS_USADAS = {
+    "consumer": COLUNAS_CONSUMER + COLUNAS_OPCIONAIS["consumer"],
+    "enterprise": COLUNAS_ENTERPRISE + COLUNAS_OPCIONAIS["enterprise"],
+}
+
+COLUNAS_CATEGORICAS = [
+    "Status", "Situação", "Criado por", "Fechado por", "Caso modificado pela última vez por",
+    "Reclamação", "Diagnóstico", "Assunto", "Causa raiz", "Tipo de registro do caso"
+]
+# Colunas por trás de cada filtro/gráfico do dashboard, por tipo de relatório
+DIMENSOES = {
+    "enterprise": {
+        "aberto": "Criado por", "fechado": "Fechado por",
+        "categoria": "Reclamação", "diagnostico": "Diagnóstico",
+    },
+    "consumer": {
+        "aberto": "Criado por", "fechado": "Caso modificado pela última vez por",
+        "categoria": "Assunto", "diagnostico": "Causa raiz",
+    },
+}
+# Acima dessa proporção de valores distintos o categórico deixa de compensar
+LIMITE_CARDINALIDADE = 0.5
+
+
+class Normalizado(NamedTuple):
+    df: pd.DataFrame
+    tipo: str
+    memoria_antes: int
+    memoria_depois: int
+
+
+def detectar_tipo(df: pd.DataFrame) -> str:
+    if all(col in df.columns for col in COLUNAS_CONSUMER):
+        return "consumer"
+    return "enterprise"
+
+
+def uso_memoria(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def categorico_sem_espacos(serie: pd.Series) -> pd.Series:
+    # O strip é feito uma vez por valor distinto e não por linha
+    codigos, valores = pd.factorize(serie, use_na_sentinel=False)
+    limpos = pd.Index(valores).astype(str).str.strip()
+    novos_codigos, categorias = pd.factorize(limpos, sort=True)
+    return pd.Series(
+        pd.Categorical.from_codes(novos_codigos[codigos], categories=categorias),
+        index=serie.index, name=serie.name
+    )
+
+
+def igual_sem_caixa(serie: pd.Series, valor: str) -> pd.Series:
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        acertos = np.asarray(serie.cat.categories.str.lower() == valor)
+        return pd.Series(acertos[serie.cat.codes], index=serie.index)
+    return serie.str.lower() == valor
+
+
+def compactar(df: pd.DataFrame, colunas) -> pd.DataFrame:
+    """Texto sem espaços nas bordas em ``colunas``, categórico quando compensa.
+
+    As demais colunas de ``df`` são mantidas como estão.
+    """
+    limite = max(len(df) * LIMITE_CARDINALIDADE, 1)
+    saida = {}
+    for col in df.columns:
+        serie = df[col]
+        if col not in colunas:
+            saida[col] = serie
+        elif col in COLUNAS_CATEGORICAS and serie.nunique() <= limite:
+            saida[col] = categorico_sem_espacos(serie)
+        else:
+            saida[col] = serie.astype(str).str.strip()
+    return pd.DataFrame(saida, index=df.index)
+
+
+def normalizar(df: pd.DataFrame) -> Normalizado:
+    tipo = detectar_tipo(df)
+    memoria_antes = uso_memoria(df)
+
+    colunas = [col for col in COLUNAS_USADAS[tipo] if col in df.columns]
+    normalizado = compactar(df[colunas], colunas)
+
+    # ---------------- FLAG CHAMADOS FECHADOS ----------------
+    if tipo == "enterprise":
+        normalizado["Fechado"] = igual_sem_caixa(normalizado["Status"], "fechado")
+        normalizado = adicionar_tempo_atendimento(normalizado)
+    else:
+        normalizado["Fechado"] = igual_sem_caixa(normalizado["Situação"], "resolvido ou completado")
+
+    return Normalizado(normalizado, tipo, memoria_antes, uso_memoria(normalizado))
@@ -0,0 +1,94 @@
+"""Pipeline completo de um relatório, sem depender do Streamlit.
+
+Reúne as etapas usadas pelo Dashboard.py (preparo, filtros, agregação e
+gráficos) para que o mesmo resultado possa ser gerado em lote pela linha de
+comando.
+"""
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from chamados.agregacao import Agregados, agregar
+from chamados.assunto import PALAVRAS_CHAVE
+from chamados.graficos import TOP_N_PADRAO, grafico_barras
+from chamados.normalizacao import DIMENSOES
+from chamados.preparo import RelatorioPreparado, classificar_satelite, preparar_relatorio
+
+TITULOS = {"consumer": "📊 Chamados Consumer", "enterprise": "📊 Chamados Enterprise"}
+
+
+@dataclass
+class Secao:
+    titulo: str
+    icone: str
+    tabela: pd.DataFrame | None
+    x: str
+    y: str = "Qtd de Chamados"
+    altura: int = 550
+    top_n: int | None = None
+    fig: object = None
+
+    def grafico(self):
+        return grafico_barras(self.tabela, self.x, self.y, self.top_n)
+
+
+@dataclass
+class ResultadoDashboard:
+    relatorio: RelatorioPreparado
+    titulo: str
+    agregados: Agregados
+    df_filtrado: pd.DataFrame
+    secoes: list = field(default_factory=list)
+
+
+def secoes_graficos(tipo: str, agregados: Agregados, top_n: int | None = None) -> list[Secao]:
+    """Seções de gráfico na ordem em que aparecem no dashboard e no HTML.
+
+    ``top_n`` limita as barras de cada gráfico (o resto vira "Outros").
+    """
+    dimensoes = DIMENSOES[tipo]
+    tabelas = agregados.tabelas
+    secoes = [
+        Secao("Chamados abertos por usuário", "🔵", tabelas["aberto"], dimensoes["aberto"]),
+        Secao("Chamados fechados por usuário", "🔴", tabelas["fechado"], dimensoes["fechado"]),
+        Secao("Reclamação" if tipo == "enterprise" else "Assunto", "📌", tabelas["categoria"], dimensoes["categoria"]),
+        Secao("Diagnóstico" if tipo == "enterprise" else "Causa Raiz", "📌", tabelas["diagnostico"], dimensoes["diagnostico"]),
+    ]
+    if agregados.satelite is not None:
+        secoes.append(Secao("Satélite", "🛰️", agregados.satelite, "Assunto", "Qtd", altura=300))
+    for secao in secoes:
+        secao.top_n = top_n
+    return secoes
+
+
+def executar(conteudo: bytes, selecoes: dict | None = None, palavras_chave=PALAVRAS_CHAVE,
+             com_graficos: bool = True, top_n: int | None = TOP_N_PADRAO) -> ResultadoDashboard:
+    """Processa um CSV como o dashboard faria com os filtros ``selecoes``.
+
+    ``selecoes`` usa as mesmas chaves de ``normalizacao.DIMENSOES``
+    ("aberto", "fechado", "categoria", "diagnostico").
+    """
+    relatorio = preparar_relatorio(conteudo)
+    df = relatorio.df
+    dimensoes = DIMENSOES[relatorio.tipo]
+
+    satelite = None
+    if relatorio.tipo == "consumer":
+        satelite = classificar_satelite(relatorio, palavras_chave)
+        df = df.assign(Assunto_Normalizado=pd.Categorical.from_codes(*satelite))
+
+    mascara = relatorio.indice.mascara({
+        dimensoes[dimensao]: valores for dimensao, valores in (selecoes or {}).items()
+    })
+    df_filtrado = df if mascara is None else df[mascara]
+    tempos = df["TempoAtendimentoMin"].to_numpy() if "TempoAtendimentoMin" in df.columns else None
+    agregados = agregar(relatorio.indice, dimensoes, df["Fechado"].to_numpy(), mascara,
+                        satelite=satelite, tempos=tempos)
+
+    secoes = secoes_graficos(relatorio.tipo, agregados, top_n)
+    if com_graficos:
+        for secao in secoes:
+            if secao.tabela is not None:
+                secao.fig = secao.grafico()
+
+    return ResultadoDashboard(relatorio, TITULOS[relatorio.tipo], agregados, df_filtrado, secoes)
@@ -0,0 +1,101 @@
+"""Preparação de um upload: leitura, normalização e cache por conteúdo.
+
+Tudo o que depende apenas do arquivo é calculado aqui uma única vez e
+guardado em um cache LRU pelo hash do conteúdo; os reruns do Streamlit
+(cliques em filtros, por exemplo) só reaproveitam o resultado.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from chamados.assunto import ClassificadorAssunto
+from chamados.cache import CacheLRU, hash_conteudo
+from chamados.filtros import IndiceFiltros
+from chamados.historico import HistoricoParquet, mesclar
+from chamados.ingestao import ler_csv
+from chamados.instrumentacao import etapa
+from chamados.normalizacao import DIMENSOES, Normalizado, normalizar, uso_memoria
+
+_cache_relatorios = CacheLRU(max_entradas=8)
+_cache_satelite = CacheLRU(max_entradas=8)
+
+
+@dataclass(frozen=True)
+class RelatorioPreparado:
+    """Resultado compartilhado pelo cache; ``df`` não deve ser alterado no lugar."""
+    chave: str
+    df: pd.DataFrame
+    tipo: str
+    memoria_antes: int
+    memoria_depois: int
+    indice: IndiceFiltros
+
+
+def montar_relatorio(chave: str, normalizado: Normalizado) -> RelatorioPreparado:
+    return RelatorioPreparado(
+        chave=chave,
+        df=normalizado.df,
+        tipo=normalizado.tipo,
+        memoria_antes=normalizado.memoria_antes,
+        memoria_depois=normalizado.memoria_depois,
+        indice=IndiceFiltros(normalizado.df, DIMENSOES[normalizado.tipo].values()),
+    )
+
+
+def preparar(conteudo: bytes, chave: str | None = None) -> RelatorioPreparado:
+    with etapa("leitura") as registro:
+        df = ler_csv(conteudo)
+        registro.linhas = len(df)
+    with etapa("normalizacao") as registro:
+        normalizado = normalizar(df)
+        registro.linhas = len(normalizado.df)
+    with etapa("indice"):
+        return montar_relatorio(chave or hash_conteudo(conteudo), normalizado)
+
+
+def preparar_relatorio(conteudo: bytes) -> RelatorioPreparado:
+    chave = hash_conteudo(conteudo)
+    return _cache_relatorios.obter_ou_calcular(chave, lambda: preparar(conteudo, chave))
+
+
+def preparar_combinado(relatorios: list[RelatorioPreparado]) -> RelatorioPreparado:
+    """Junta vários uploads do mesmo tipo, sem chamados repetidos."""
+    if len(relatorios) == 1:
+        return relatorios[0]
+    tipos = {relatorio.tipo for relatorio in relatorios}
+    if len(tipos) > 1:
+        raise ValueError("Os arquivos misturam relatórios enterprise e consumer.")
+    tipo = tipos.pop()
+    chave = hash_conteudo("|".join(relatorio.chave for relatorio in relatorios).encode("utf-8"))
+
+    def calcular():
+        df = mesclar([relatorio.df for relatorio in relatorios], tipo)
+        memoria_antes = sum(relatorio.memoria_antes for relatorio in relatorios)
+        return montar_relatorio(chave, Normalizado(df, tipo, memoria_antes, uso_memoria(df)))
+
+    return _cache_relatorios.obter_ou_calcular(chave, calcular)
+
+
+def preparar_historico(historico: HistoricoParquet) -> RelatorioPreparado | None:
+    """Histórico acumulado; só é relido do disco quando ganha partes novas."""
+    if not historico.existe():
+        return None
+    chave = f"historico-{historico.tipo}-{historico.versao()}"
+
+    def calcular():
+        df = historico.carregar()
+        return montar_relatorio(chave, Normalizado(df, historico.tipo, uso_memoria(df), uso_memoria(df)))
+
+    return _cache_relatorios.obter_ou_calcular(chave, calcular)
+
+
+def classificar_satelite(relatorio: RelatorioPreparado, palavras_chave) -> tuple[np.ndarray, list]:
+    """Códigos por linha e rótulos do gráfico Satélite, em cache por upload e lista de chaves."""
+    palavras_chave = tuple(palavras_chave)
+
+    def calcular():
+        classificador = ClassificadorAssunto(palavras_chave)
+        return classificador.codigos_por_indice(relatorio.indice, "Assunto"), classificador.rotulos
+
+    return _cache_satelite.obter_ou_calcular((relatorio.chave, palavras_chave), calcular)
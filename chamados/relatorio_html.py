@@ -0,0 +1,94 @@
+"""Exportação do dashboard em HTML.
+
+O relatório só é montado quando alguém pede o download. Ele é escrito em
+partes por ``escrever_relatorio``: a linha de comando grava direto no
+arquivo, sem o relatório inteiro na memória; para o download do dashboard
+ele vira ``bytes``, já que o Streamlit guarda o arquivo inteiro em memória
+de qualquer forma. A tabela completa sai em blocos de linhas e o HTML de
+cada gráfico fica em cache pela tabela agregada que o originou.
+"""
+import io
+
+import pandas as pd
+
+from chamados.agregacao import Agregados
+from chamados.cache import CacheLRU
+from chamados.graficos import chave_grafico
+
+TAMANHO_BLOCO = 5000
+ESTILO = (
+    "<style>body{font-family:Arial;background:#f0f4f8;margin:20px;}h1,h2{color:#000;}"
+    "table{border-collapse:collapse;width:100%;margin:10px 0;}th,td{border:1px solid #ccc;padding:5px;background:#fafafa;}"
+    "th{background:#e2e2e2;} .metric{font-weight:bold;margin:5px 0;}</style>"
+)
+
+_cache_figuras = CacheLRU(max_entradas=32)
+
+
+def escapar(serie: pd.Series) -> pd.Series:
+    # Ausentes (ex.: fechamento de chamado aberto) viram célula vazia; no
+    # pandas 3 astype(str) mantém NaN como ausente e quebraria o join
+    texto = serie.astype(object).where(serie.notna(), "").astype(str)
+    return (
+        texto
+        .str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+        .str.replace('"', "&quot;", regex=False)
+    )
+
+
+def linhas_html(df: pd.DataFrame, tamanho_bloco: int = TAMANHO_BLOCO):
+    """Gera a tabela ``df`` em HTML, um bloco de linhas por vez."""
+    cabecalho = pd.Series(df.columns.astype(str))
+    yield "<table><thead><tr>" + "".join("<th>" + escapar(cabecalho) + "</th>") + "</tr></thead><tbody>"
+    for inicio in range(0, len(df), tamanho_bloco):
+        bloco = df.iloc[inicio:inicio + tamanho_bloco]
+        linhas = pd.Series("<tr>", index=bloco.index)
+        for col in bloco.columns:
+            linhas = linhas + "<td>" + escapar(bloco[col]) + "</td>"
+        yield "".join(linhas + "</tr>")
+    yield "</tbody></table>"
+
+
+def html_figura(fig, chave) -> str:
+    """HTML da figura em cache pela mesma chave de ``graficos.chave_grafico``."""
+    return _cache_figuras.obter_ou_calcular(chave, lambda: fig.to_html(full_html=False, include_plotlyjs="cdn"))
+
+
+def escrever_relatorio(escrever, titulo: str, agregados: Agregados, secoes, df_tabela: pd.DataFrame):
+    """Escreve o relatório chamando ``escrever`` com cada pedaço de texto.
+
+    ``secoes`` são objetos ``pipeline.Secao``; seções sem tabela ou figura
+    são omitidas.
+    """
+    escrever(f"<html><head><meta charset='utf-8'><title>{titulo}</title>")
+    escrever(ESTILO)
+    escrever("</head><body>")
+    escrever(f"<h1>{titulo}</h1>")
+    escrever(f"<div class='metric'>Total de chamados: {agregados.total}</div>")
+    escrever(f"<div class='metric'>Chamados abertos: {agregados.abertos} ({agregados.pct_abertos:.1f}%)</div>")
+    escrever(f"<div class='metric'>Chamados fechados: {agregados.fechados} ({agregados.pct_fechados:.1f}%)</div>")
+    escrever(f"<div class='metric'>Maior ofensor: {agregados.maior_ofensor} ({agregados.pct_ofensor}%)</div>")
+
+    for secao in secoes:
+        tabela, fig = secao.tabela, secao.fig
+        if tabela is None or fig is None:
+            continue
+        escrever(f"<h2>{secao.titulo}</h2>")
+        escrever("<div style='display:flex; gap:40px; align-items:flex-start;'>")
+        escrever("<div style='width:45%;'>{}</div>".format(tabela.to_html(index=False)))
+        escrever("<div style='width:55%;'>{}</div>".format(html_figura(fig, chave_grafico(tabela, secao.x, secao.y, secao.top_n))))
+        escrever("</div>")
+
+    escrever("<h2>Tabela completa filtrada</h2>")
+    for parte in linhas_html(df_tabela):
+        escrever(parte)
+    escrever("</body></html>")
+
+
+def gerar_relatorio_html(titulo: str, agregados: Agregados, secoes, df_tabela: pd.DataFrame) -> bytes:
+    """Relatório completo em UTF-8, pronto para o ``st.download_button``."""
+    arquivo = io.BytesIO()
+    escrever_relatorio(lambda texto: arquivo.write(texto.encode("utf-8")), titulo, agregados, secoes, df_tabela)
+    return arquivo.getvalue()
@@ -0,0 +1,107 @@
+"""Gerador de relatórios sintéticos para testes de carga.
+
+Produz CSVs enterprise e consumer com as colunas exigidas pela tela inicial
+do dashboard (e algumas colunas extras que o dashboard descarta), no mesmo
+formato dos exports: separador ``;``, latin1, datas dd/mm/aaaa.
+
+Uso::
+
+    python -m chamados.sintetico -n 10000 100000 1000000 -o dados_sinteticos/
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INICIO = pd.Timestamp("2024-01-01")
+PERIODO_DIAS = 365
+
+
+def _nomes(prefixo: str, quantidade: int) -> np.ndarray:
+    return np.array([f"{prefixo} {i:04d}" for i in range(1, quantidade + 1)], dtype=object)
+
+
+def _escolher(rng, valores, n, concentracao=1.2):
+    # Distribuição de Zipf: poucos valores concentram a maioria dos chamados
+    pesos = 1 / np.arange(1, len(valores) + 1) ** concentracao
+    return rng.choice(valores, size=n, p=pesos / pesos.sum())
+
+
+def _datas(rng, n):
+    abertura = INICIO + pd.to_timedelta(rng.integers(0, PERIODO_DIAS * 24 * 60, n), unit="min")
+    # Tempo de atendimento log-normal, mediana de algumas horas
+    duracao = pd.to_timedelta(np.round(rng.lognormal(5.5, 1.2, n)), unit="min")
+    return pd.Series(abertura), pd.Series(abertura + duracao)
+
+
+def gerar_enterprise(n: int, semente: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    usuarios = _nomes("Usuário", 300)
+    abertura, fechamento = _datas(rng, n)
+    fechado = rng.random(n) < 0.7
+    status = np.where(fechado, "Fechado", rng.choice(["Aberto", "Em andamento", "Pendente"], n))
+    df = pd.DataFrame({
+        "Id": np.arange(1, n + 1).astype(str),
+        "Status": status,
+        "Criado por": _escolher(rng, usuarios, n),
+        "Fechado por": np.where(fechado, _escolher(rng, usuarios, n), ""),
+        "Reclamação": _escolher(rng, _nomes("Reclamação", 40), n),
+        "Diagnóstico": np.where(rng.random(n) < 0.9, _escolher(rng, _nomes("Diagnóstico", 80), n), ""),
+        "Data de abertura": abertura.dt.strftime("%d/%m/%Y"),
+        "Hora de abertura": abertura.dt.strftime("%H:%M"),
+        "Data de fechamento": np.where(fechado, fechamento.dt.strftime("%d/%m/%Y"), ""),
+        "Hora de fechamento": np.where(fechado, fechamento.dt.strftime("%H:%M"), ""),
+        "Prioridade": rng.choice(["Baixa", "Média", "Alta", "Crítica"], n),
+        "Descrição": pd.Series(rng.integers(0, 10**9, n)).map("Cliente relata falha no circuito {}".format),
+    })
+    return df
+
+
+def gerar_consumer(n: int, semente: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    usuarios = _nomes("Atendente", 500)
+    abertura, _ = _datas(rng, n)
+    satelites = np.array(["E65", "63W/T19", "J3", "SES-14", "Amazonas Nexus"], dtype=object)
+    # Assunto é texto livre: palavra-chave misturada a um número de contrato
+    assunto = pd.Series(_escolher(rng, satelites, n)) + pd.Series(rng.integers(0, 50_000, n)).map(" - sem sinal contrato {}".format)
+    assunto[rng.random(n) < 0.15] = "Dúvida sobre fatura"
+    return pd.DataFrame({
+        "Número do caso": np.arange(10_000_000, 10_000_000 + n).astype(str),
+        "Situação": rng.choice(["Resolvido ou completado", "Novo", "Em atendimento", "Aguardando cliente"], n, p=[0.6, 0.15, 0.15, 0.1]),
+        "Assunto": assunto,
+        "Data/Hora de abertura": abertura.dt.strftime("%d/%m/%Y %H:%M"),
+        "Criado por": _escolher(rng, usuarios, n),
+        "Causa raiz": np.where(rng.random(n) < 0.8, _escolher(rng, _nomes("Causa", 60), n), ""),
+        "Tipo de registro do caso": rng.choice(["Suporte", "Financeiro", "Instalação"], n),
+        "Caso modificado pela última vez por": _escolher(rng, usuarios, n),
+        "Canal": rng.choice(["Telefone", "Chat", "E-mail"], n),
+    })
+
+
+GERADORES = {"enterprise": gerar_enterprise, "consumer": gerar_consumer}
+
+
+def gerar_csv(tipo: str, n: int, semente: int = 0) -> bytes:
+    """CSV sintético em bytes, como viria de um upload."""
+    return GERADORES[tipo](n, semente).to_csv(sep=";", index=False).encode("latin1")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m chamados.sintetico", description="Gera relatórios CSV sintéticos.")
+    parser.add_argument("-n", "--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("-t", "--tipos", nargs="+", choices=list(GERADORES), default=list(GERADORES))
+    parser.add_argument("-o", "--saida", type=Path, default=Path("dados_sinteticos"))
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    for tipo in args.tipos:
+        for n in args.linhas:
+            destino = args.saida / f"{tipo}_{n}.csv"
+            destino.write_bytes(gerar_csv(tipo, n, args.semente))
+            print(f"{destino} ({destino.stat().st_size / 1024**2:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tempo de atendimento (SLA) dos relatórios enterprise.
+
+As datas são convertidas uma vez na normalização, com formato explícito
+dia/mês/ano, e o tempo de atendimento em minutos fica guardado como coluna.
+A cada filtro só são calculadas as estatísticas sobre as linhas selecionadas.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from chamados.filtros import IndiceFiltros
+
+FORMATOS_DATA_HORA = ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S")
+COLUNAS_DATA_HORA = {
+    "DataHoraAbertura": ("Data de abertura", "Hora de abertura"),
+    "DataHoraFechamento": ("Data de fechamento", "Hora de fechamento"),
+}
+QUANTIS = {"P90 (min)": 0.9, "P95 (min)": 0.95}
+
+
+@dataclass
+class ResumoSLA:
+    qtd: int
+    media: float
+    mediana: float
+    p90: float
+    p95: float
+
+
+def converter_data_hora(data: pd.Series, hora: pd.Series) -> pd.Series:
+    return converter_texto_data_hora(data.astype(str) + " " + hora.astype(str))
+
+
+def converter_texto_data_hora(texto: pd.Series) -> pd.Series:
+    """Texto "dd/mm/aaaa hh:mm[:ss]" em datetime; o que não casa vira NaT."""
+    texto = texto.astype(str)
+    convertido = pd.to_datetime(texto, format=FORMATOS_DATA_HORA[0], errors="coerce")
+    for formato in FORMATOS_DATA_HORA[1:]:
+        faltando = convertido.isna() & (texto.str.strip() != "")
+        if not faltando.any():
+            break
+        convertido[faltando] = pd.to_datetime(texto[faltando], format=formato, errors="coerce")
+    return convertido
+
+
+def adicionar_tempo_atendimento(df: pd.DataFrame) -> pd.DataFrame:
+    """Inclui as colunas de data/hora e ``TempoAtendimentoMin`` quando existirem."""
+    if not all(col in df.columns for cols in COLUNAS_DATA_HORA.values() for col in cols):
+        return df
+    for destino, (data, hora) in COLUNAS_DATA_HORA.items():
+        df[destino] = converter_data_hora(df[data], df[hora])
+    duracao = df["DataHoraFechamento"] - df["DataHoraAbertura"]
+    df["TempoAtendimentoMin"] = (duracao.dt.total_seconds() / 60).clip(lower=0)
+    return df
+
+
+def resumo_sla(tempos: np.ndarray) -> ResumoSLA | None:
+    tempos = tempos[~np.isnan(tempos)]
+    if not len(tempos):
+        return None
+    p90, p95 = np.quantile(tempos, list(QUANTIS.values()))
+    return ResumoSLA(
+        qtd=len(tempos),
+        media=round(float(tempos.mean()), 2),
+        mediana=round(float(np.median(tempos)), 2),
+        p90=round(float(p90), 2),
+        p95=round(float(p95), 2),
+    )
+
+
+def sla_por(indice: IndiceFiltros, coluna: str, tempos: np.ndarray, selecao: np.ndarray) -> pd.DataFrame | None:
+    """Estatísticas de tempo de atendimento agrupadas pelos valores de ``coluna``."""
+    codigos = indice.codigos(coluna)
+    validos = selecao & ~np.isnan(tempos) & (codigos >= 0)
+    vazio = indice.codigo(coluna, "")
+    if vazio >= 0:
+        validos &= codigos != vazio
+    if not validos.any():
+        return None
+    grupos = pd.Series(tempos[validos]).groupby(codigos[validos])
+    tabela = grupos.agg(["count", "mean", "median"])
+    tabela.columns = ["Qtd", "Média (min)", "Mediana (min)"]
+    quantis = grupos.quantile(list(QUANTIS.values())).unstack()
+    quantis.columns = list(QUANTIS)
+    tabela = tabela.join(quantis).round(2)
+    tabela.insert(0, coluna, indice.categorias(coluna)[tabela.index.to_numpy()])
+    return tabela.sort_values("Qtd", ascending=False, kind="stable").reset_index(drop=True)
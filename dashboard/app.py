@@ -1,9 +1,12 @@
+import hashlib
 import streamlit as st
 import pandas as pd
-from supabase import create_client
 from datetime import date
 from pathlib import Path
-import altair as alt
+
+from armazenamento import configuracao, criar_armazenamento
+from instrumentacao import Medidor, etapa
+from planilhas import exportar_xlsx, importar, ler_planilha, validar
 
 # ======================
 # CONFIG
@@ -65,22 +68,41 @@ with col_title:
 st.divider()
 
 # ======================
-# SUPABASE
+# INSTRUMENTAÇÃO
 # ======================
-url = "https://whbwdmmgrylwehdarupk.supabase.co"
-key = "sb_publishable_iU9EdbgP5pxbjxzTtxwmAg_6Vqw03uW"
-supabase = create_client(url, key)
+# Opcional: ?debug=1 na URL ou DESEMPENHO_PAINEL=1 mostram o painel; DESEMPENHO_LOG grava o log;
+# DESEMPENHO_MEMORIA=1 também mede o pico de memória (tracemalloc, deixa o processo mais lento)
+medidor = Medidor.do_ambiente("dashboard/app.py", painel=st.query_params.get("debug") == "1")
 
 # ======================
-# LOAD DATA
+# ARMAZENAMENTO
 # ======================
-def load_data():
-    res = supabase.table("registros").select("*").execute()
+@st.cache_resource
+def get_cliente_supabase(url, key):
+    # Um cliente por processo: reaproveita as conexões HTTP entre reruns.
+    # O supabase só é importado se este backend estiver em uso.
+    from supabase import create_client
+    return create_client(url, key)
+
 
-    if not res.data:
-        return pd.DataFrame(columns=["id","mes","operadora","circuito","desconto"])
+@st.cache_resource
+def get_armazenamento():
+    try:
+        secrets = st.secrets.get("armazenamento", {})
+    except FileNotFoundError:
+        secrets = {}
+    return criar_armazenamento(configuracao(secrets), get_cliente_supabase)
 
-    df = pd.DataFrame(res.data)
+
+armazenamento = get_armazenamento()
+
+# ======================
+# LOAD DATA
+# ======================
+def load_data(mes=None, operadora=None, **pagina):
+    with etapa("listar") as registro:
+        df = armazenamento.listar(mes, operadora, **pagina)
+        registro.linhas = len(df)
     df.columns = df.columns.str.lower()
     df["mes_dt"] = pd.to_datetime(df["mes"], format="%Y-%m", errors="coerce")
     return df
@@ -89,19 +111,20 @@ def load_data():
 # INSERT
 # ======================
 def insert_row(mes, operadora, circuito, desconto):
-    res = supabase.table("registros").insert({
+    salvas = armazenamento.inserir([{
         "mes": mes,
         "operadora": operadora,
         "circuito": circuito,
         "desconto": desconto
-    }).execute()
-    return bool(res.data)
+    }])
+    return bool(salvas)
 
 # ======================
 # DELETE
 # ======================
-def delete_row(row_id):
-    supabase.table("registros").delete().eq("id", row_id).execute()
+def delete_rows(ids):
+    # Uma única chamada ao banco para toda a seleção
+    armazenamento.excluir(ids)
 
 # ======================
 # FORM
@@ -133,21 +156,64 @@ with st.expander("Registrar", expanded=False):
 
         if submit:
             if operadora and circuito:
-                if insert_row(mes, operadora, circuito, float(desconto)):
+                with etapa("inserir"):
+                    salvo = insert_row(mes, operadora, circuito, float(desconto))
+                if salvo:
                     st.success("Registro salvo")
+                    medidor.finalizar(evento="insercao")
                     st.rerun()
             else:
                 st.error("Preencha todos os campos")
 
+# ======================
+# IMPORTAÇÃO
+# ======================
+with st.expander("Importar planilha", expanded=False):
+
+    arquivo = st.file_uploader("CSV ou XLSX com as colunas Mes, Operadora, Circuito e Desconto", type=["csv", "xlsx"])
+
+    if arquivo is not None:
+        conteudo = arquivo.getvalue()
+        try:
+            with etapa("validacao_planilha") as registro:
+                validacao = validar(ler_planilha(arquivo.name, conteudo))
+                registro.linhas = len(validacao.validos) + len(validacao.erros)
+        except ValueError as erro:
+            st.error(str(erro))
+        else:
+            st.caption(f"{len(validacao.validos)} linhas válidas, {len(validacao.erros)} com erro")
+            if len(validacao.erros):
+                st.dataframe(validacao.erros.head(200), hide_index=True, use_container_width=True)
+
+            # Evita gravar o mesmo arquivo duas vezes na mesma sessão
+            chave_arquivo = hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+            importados = st.session_state.setdefault("planilhas_importadas", set())
+
+            if chave_arquivo in importados:
+                st.info("Este arquivo já foi importado.")
+            elif st.button("Importar", disabled=validacao.validos.empty):
+                barra = st.progress(0.0, text="Importando...")
+                with etapa("importacao") as registro:
+                    salvas = importar(
+                        armazenamento,
+                        validacao.validos,
+                        progresso=lambda feitos, total: barra.progress(feitos / total, text=f"{feitos}/{total} registros"),
+                    )
+                    registro.linhas = salvas
+                importados.add(chave_arquivo)
+                st.success(f"{salvas} registros importados")
+
 st.divider()
 
 # ======================
 # DATA
 # ======================
-df = load_data()
+with etapa("opcoes"):
+    opcoes = armazenamento.opcoes()
 
-if df.empty:
+if not opcoes.registros:
     st.warning("Nenhum dado cadastrado.")
+    medidor.finalizar(st.sidebar)
     st.stop()
 
 # ======================
@@ -156,16 +222,18 @@ if df.empty:
 with st.sidebar:
     st.markdown("### 🔎 Filtros")
 
-    mes_f = st.selectbox("Mês", ["Todos"] + sorted(df["mes"].dropna().unique()))
-    op_f = st.selectbox("Operadora", ["Todas"] + sorted(df["operadora"].dropna().unique()))
-
-filtered = df.copy()
+    mes_f = st.selectbox("Mês", ["Todos"] + opcoes.meses)
+    op_f = st.selectbox("Operadora", ["Todas"] + opcoes.operadoras)
 
-if mes_f != "Todos":
-    filtered = filtered[filtered["mes"] == mes_f]
+filtros = {
+    "mes": None if mes_f == "Todos" else mes_f,
+    "operadora": None if op_f == "Todas" else op_f,
+}
 
-if op_f != "Todas":
-    filtered = filtered[filtered["operadora"] == op_f]
+# Somas e contagens vêm prontas do banco
+with etapa("resumo") as registro:
+    resumo = armazenamento.resumir(**filtros)
+    registro.linhas = resumo.registros
 
 # ======================
 # KPIs
@@ -174,9 +242,9 @@ st.subheader("📊 Indicadores")
 
 c1, c2, c3 = st.columns(3)
 
-c1.metric("Total (R$)", f"{filtered['desconto'].sum():,.2f}")
-c2.metric("Registros", len(filtered))
-c3.metric("Operadoras", filtered["operadora"].nunique())
+c1.metric("Total (R$)", f"{resumo.total:,.2f}")
+c2.metric("Registros", resumo.registros)
+c3.metric("Operadoras", resumo.operadoras)
 
 st.divider()
 
@@ -185,16 +253,15 @@ st.divider()
 # ======================
 st.subheader("📈 Análise")
 
+# Só é importado quando há dados para desenhar
+import altair as alt
+
 g1, g2 = st.columns(2)
 
 with g1:
     st.markdown("**Descontos por Operadora**")
 
-    chart1 = (
-        filtered.groupby("operadora")["desconto"]
-        .sum()
-        .reset_index()
-    )
+    chart1 = resumo.por_operadora
 
     bar = alt.Chart(chart1).mark_bar(color="white").encode(
         x="operadora",
@@ -210,12 +277,7 @@ with g1:
 with g2:
     st.markdown("**Evolução Mensal**")
 
-    evolucao = (
-        filtered.dropna(subset=["mes_dt"])
-        .groupby("mes_dt")["desconto"]
-        .sum()
-        .reset_index()
-    )
+    evolucao = resumo.por_mes
 
     line = alt.Chart(evolucao).mark_line(color="white").encode(
         x="mes_dt:T",
@@ -231,32 +293,71 @@ with g2:
 st.divider()
 
 # ======================
-# RESTANTE IGUAL
+# REGISTROS
 # ======================
 st.subheader("📋 Registros")
 
-filtered = filtered.sort_values("mes_dt", ascending=False)
+p1, p2, p3, p4 = st.columns([2,2,2,2])
+
+tamanho_pagina = p1.selectbox("Por página", [25, 50, 100, 200], index=1)
+ordem = p2.selectbox("Ordem", ["Mais recentes", "Mais antigos"])
+total_paginas = max(1, -(-resumo.registros // tamanho_pagina))
+pagina = p3.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1)
+
+# O XLSX só é gerado quando o botão é clicado
+def exportar_com_medicao(filtros):
+    # Roda fora do rerun, por isso mede direto no medidor e grava à parte
+    with medidor.etapa("exportacao_xlsx"):
+        arquivo = exportar_xlsx(armazenamento, **filtros)
+    medidor.gravar_log(evento="exportacao_xlsx")
+    return arquivo
+
+
+p4.download_button(
+    "📤 Exportar XLSX",
+    data=lambda: exportar_com_medicao(filtros),
+    file_name="registros.xlsx",
+    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+)
+
+# Só a página visível sai do banco, já ordenada por mês
+registros = load_data(
+    **filtros,
+    inicio=(pagina - 1) * tamanho_pagina,
+    limite=tamanho_pagina,
+    decrescente=ordem == "Mais recentes",
+)
+
+tabela = pd.DataFrame({
+    "Excluir": False,
+    "Mês/Ano": registros["mes_dt"].dt.strftime("%m/%Y").fillna(registros["mes"]),
+    "Operadora": registros["operadora"],
+    "Circuito": registros["circuito"],
+    "Valor (R$)": registros["desconto"],
+}).set_axis(registros["id"].to_numpy())
+
+editado = st.data_editor(
+    tabela,
+    hide_index=True,
+    use_container_width=True,
+    disabled=["Mês/Ano", "Operadora", "Circuito", "Valor (R$)"],
+    column_config={
+        "Excluir": st.column_config.CheckboxColumn("🗑️", width="small"),
+        "Valor (R$)": st.column_config.NumberColumn(format="R$ %.2f"),
+    },
+    key=f"registros_{mes_f}_{op_f}_{pagina}_{tamanho_pagina}_{ordem}",
+)
+
+selecionados = editado.index[editado["Excluir"]].tolist()
+
+if st.button(f"🗑️ Excluir selecionados ({len(selecionados)})", disabled=not selecionados):
+    with etapa("excluir") as registro:
+        delete_rows(selecionados)
+        registro.linhas = len(selecionados)
+    medidor.finalizar(evento="exclusao")
+    st.rerun()
 
-h1, h2, h3, h4, h5 = st.columns([2,2,3,2,1])
-
-h1.markdown("**Mês/Ano**")
-h2.markdown("**Operadora**")
-h3.markdown("**Circuito**")
-h4.markdown("**Valor (R$)**")
-h5.markdown("")
-
-st.divider()
-
-for _, row in filtered.iterrows():
-    c1, c2, c3, c4, c5 = st.columns([2,2,3,2,1])
-
-    mes_formatado = row["mes_dt"].strftime("%m/%Y") if pd.notna(row["mes_dt"]) else row["mes"]
-
-    c1.write(mes_formatado)
-    c2.write(row["operadora"])
-    c3.write(row["circuito"])
-    c4.write(f"R$ {row['desconto']:.2f}")
-
-    if c5.button("🗑️", key=f"del_{row['id']}"):
-        delete_row(row["id"])
-        st.rerun()
+# ======================
+# DESEMPENHO
+# ======================
+medidor.finalizar(st.sidebar)
@@ -0,0 +1,230 @@
+"""Onde os registros de descontos ficam guardados.
+
+O app fala só com a interface ``Armazenamento``; a implementação é escolhida
+pela configuração (variável de ambiente ``ARMAZENAMENTO`` ou a seção
+``[armazenamento]`` do ``secrets.toml``):
+
+* ``supabase`` (padrão): tabela ``registros`` no Supabase, lida através do
+  espelho local (ver ``espelho.py``);
+* ``sqlite``: arquivo SQLite local, para usar o dashboard sem rede e medir
+  o app sem a latência do Supabase.
+
+No Supabase, as agregações e a listagem filtrada rodam por padrão no
+espelho local; com ``resumo = "rpc"`` vão direto ao Postgres, e as
+agregações são calculadas pelas funções de ``sql/resumo_registros.sql``.
+"""
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from carregamento import COLUNAS, buscar_pagina, buscar_paginas
+from consultas import (Opcoes, Resumo, listar_sqlite, opcoes_json, opcoes_sqlite, resumir_sqlite,
+                       resumo_json)
+from espelho import EspelhoLocal
+from instrumentacao import etapa
+
+PASTA = Path(__file__).parent
+PADROES = {
+    "tipo": "supabase",
+    "supabase_url": "https://whbwdmmgrylwehdarupk.supabase.co",
+    "supabase_key": "sb_publishable_iU9EdbgP5pxbjxzTtxwmAg_6Vqw03uW",
+    "espelho": str(PASTA / "espelho.sqlite"),
+    "sqlite": str(PASTA / "registros.sqlite"),
+    "resumo": "espelho",
+}
+# Nome da variável de ambiente que sobrepõe cada opção
+VARIAVEIS = {
+    "tipo": "ARMAZENAMENTO",
+    "supabase_url": "SUPABASE_URL",
+    "supabase_key": "SUPABASE_KEY",
+    "espelho": "ESPELHO_REGISTROS",
+    "sqlite": "REGISTROS_SQLITE",
+    "resumo": "RESUMO_REGISTROS",
+}
+
+
+def configuracao(secrets=None) -> dict:
+    """Opções de armazenamento: ambiente > secrets > padrões."""
+    config = dict(PADROES)
+    config.update({chave: valor for chave, valor in (secrets or {}).items() if chave in PADROES})
+    config.update({chave: os.environ[var] for chave, var in VARIAVEIS.items() if var in os.environ})
+    return config
+
+
+class Armazenamento(ABC):
+    """Operações que o dashboard faz sobre a tabela de registros."""
+
+    @abstractmethod
+    def carregar(self) -> pd.DataFrame:
+        """Todas as linhas, com as colunas de ``COLUNAS``."""
+
+    @abstractmethod
+    def opcoes(self) -> Opcoes:
+        """Meses e operadoras existentes (para os filtros) e total de registros."""
+
+    @abstractmethod
+    def resumir(self, mes=None, operadora=None) -> Resumo:
+        """KPIs e séries dos gráficos; ``None`` não filtra a coluna."""
+
+    @abstractmethod
+    def listar(self, mes=None, operadora=None, inicio=0, limite=None, decrescente=True) -> pd.DataFrame:
+        """Registros que passam pelos filtros, ordenados por mês.
+
+        ``inicio``/``limite`` paginam o resultado no próprio banco.
+        """
+
+    @abstractmethod
+    def inserir(self, linhas: list[dict]) -> list[dict]:
+        """Grava as linhas e devolve-as como ficaram salvas (com ``id``)."""
+
+    @abstractmethod
+    def excluir(self, ids) -> None:
+        """Remove os registros com os ``id`` informados."""
+
+
+class ArmazenamentoSupabase(Armazenamento):
+
+    def __init__(self, cliente, espelho: EspelhoLocal, tabela="registros", resumo="espelho"):
+        if resumo not in ("espelho", "rpc"):
+            raise ValueError(f"Modo de resumo desconhecido: {resumo!r} (use 'espelho' ou 'rpc').")
+        self.cliente = cliente
+        self.espelho = espelho
+        self.tabela = tabela
+        self.resumo = resumo
+
+    def _espelho_atualizado(self):
+        # Só vai ao Supabase quando o espelho local está desatualizado
+        self.espelho.sincronizar(self.cliente)
+        return self.espelho.conectar()
+
+    def carregar(self):
+        self.espelho.sincronizar(self.cliente)
+        return self.espelho.carregar()
+
+    def opcoes(self):
+        if self.resumo == "rpc":
+            with etapa("supabase_rpc_opcoes"):
+                return opcoes_json(self.cliente.rpc("opcoes_registros").execute().data)
+        with self._espelho_atualizado() as con:
+            return opcoes_sqlite(con, "registros")
+
+    def resumir(self, mes=None, operadora=None):
+        if self.resumo == "rpc":
+            with etapa("supabase_rpc_resumo"):
+                dados = self.cliente.rpc("resumo_registros", {"p_mes": mes, "p_operadora": operadora}).execute().data
+            return resumo_json(dados)
+        with self._espelho_atualizado() as con:
+            return resumir_sqlite(con, "registros", mes, operadora)
+
+    def listar(self, mes=None, operadora=None, inicio=0, limite=None, decrescente=True):
+        if self.resumo == "rpc":
+            def filtro(consulta):
+                if mes is not None:
+                    consulta = consulta.eq("mes", mes)
+                if operadora is not None:
+                    consulta = consulta.eq("operadora", operadora)
+                # buscar_pagina completa a ordem com o id
+                return consulta.order("mes", desc=decrescente, nullsfirst=False)
+
+            with etapa("supabase_listar") as registro:
+                if limite is None:
+                    paginas = buscar_paginas(self.cliente, self.tabela, COLUNAS, filtro=filtro)
+                else:
+                    paginas = [buscar_pagina(self.cliente, self.tabela, COLUNAS, inicio, limite, filtro)]
+                registro.linhas = sum(len(pagina) for pagina in paginas)
+            return pd.DataFrame.from_records([linha for pagina in paginas for linha in pagina], columns=COLUNAS)
+        with self._espelho_atualizado() as con:
+            return listar_sqlite(con, "registros", mes, operadora, inicio, limite, decrescente)
+
+    def inserir(self, linhas):
+        with etapa("supabase_insert") as registro:
+            salvas = self.cliente.table(self.tabela).insert(linhas).execute().data or []
+            registro.linhas = len(salvas)
+        self.espelho.aplicar_insercao(salvas)
+        return salvas
+
+    def excluir(self, ids):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+        with etapa("supabase_delete") as registro:
+            self.cliente.table(self.tabela).delete().in_("id", ids).execute()
+            registro.linhas = len(ids)
+        self.espelho.aplicar_exclusao(ids)
+
+
+class ArmazenamentoSQLite(Armazenamento):
+
+    def __init__(self, caminho, tabela="registros"):
+        self.caminho = Path(caminho)
+        self.tabela = tabela
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.execute(
+                f"CREATE TABLE IF NOT EXISTS {tabela} "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, mes TEXT, operadora TEXT, circuito TEXT, desconto REAL)"
+            )
+            # Os filtros do dashboard são por mês e por operadora
+            con.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_mes ON {tabela} (mes)")
+            con.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_operadora ON {tabela} (operadora)")
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(self.caminho)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def carregar(self):
+        with self._conectar() as con:
+            return pd.read_sql_query(f"SELECT {', '.join(COLUNAS)} FROM {self.tabela}", con)
+
+    def opcoes(self):
+        with self._conectar() as con:
+            return opcoes_sqlite(con, self.tabela)
+
+    def resumir(self, mes=None, operadora=None):
+        with self._conectar() as con:
+            return resumir_sqlite(con, self.tabela, mes, operadora)
+
+    def listar(self, mes=None, operadora=None, inicio=0, limite=None, decrescente=True):
+        with self._conectar() as con:
+            return listar_sqlite(con, self.tabela, mes, operadora, inicio, limite, decrescente)
+
+    def inserir(self, linhas):
+        colunas = [col for col in COLUNAS if col != "id"]
+        sql = f"INSERT INTO {self.tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+        salvas = []
+        with self._conectar() as con:
+            for linha in linhas:
+                cursor = con.execute(sql, [linha.get(col) for col in colunas])
+                salvas.append({"id": cursor.lastrowid, **{col: linha.get(col) for col in colunas}})
+        return salvas
+
+    def excluir(self, ids):
+        with self._conectar() as con:
+            con.executemany(f"DELETE FROM {self.tabela} WHERE id = ?", [(int(i),) for i in ids])
+
+
+def criar_armazenamento(config: dict, criar_cliente=None) -> Armazenamento:
+    """Instancia o backend de ``config["tipo"]``.
+
+    ``criar_cliente(url, key)`` devolve o cliente Supabase; o app passa uma
+    função em ``st.cache_resource`` para reaproveitar o mesmo cliente (e suas
+    conexões HTTP) entre reruns e sessões.
+    """
+    tipo = config["tipo"]
+    if tipo == "sqlite":
+        return ArmazenamentoSQLite(config["sqlite"])
+    if tipo == "supabase":
+        if criar_cliente is None:
+            from supabase import create_client as criar_cliente
+        cliente = criar_cliente(config["supabase_url"], config["supabase_key"])
+        return ArmazenamentoSupabase(cliente, EspelhoLocal(config["espelho"]), resumo=config["resumo"])
+    raise ValueError(f"Armazenamento desconhecido: {tipo!r} (use 'supabase' ou 'sqlite').")
@@ -0,0 +1,66 @@
+"""Leitura paginada da tabela de registros.
+
+O PostgREST do Supabase devolve no máximo ``max-rows`` linhas por consulta
+(1000 por padrão), então um ``select("*")`` simples corta o histórico. Aqui
+a tabela é lida em faixas ``range`` de tamanho fixo, buscadas em paralelo,
+e o DataFrame é montado direto a partir das páginas.
+
+Só é usada a parte da API do cliente Python do Supabase abaixo, o que
+permite trocar o cliente por um substituto local::
+
+    cliente.table(nome).select(*colunas, count="exact", head=True).execute().count
+    cliente.table(nome).select(*colunas).order(col).range(ini, fim).execute().data
+"""
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+import pandas as pd
+
+COLUNAS = ["id", "mes", "operadora", "circuito", "desconto"]
+TAMANHO_PAGINA = 1000
+MAX_CONEXOES = 8
+
+
+def contar_linhas(cliente, tabela, filtro=None):
+    consulta = cliente.table(tabela).select("id", count="exact", head=True)
+    if filtro is not None:
+        consulta = filtro(consulta)
+    return consulta.execute().count
+
+
+def buscar_pagina(cliente, tabela, colunas, inicio, tamanho, filtro=None):
+    consulta = cliente.table(tabela).select(*colunas)
+    if filtro is not None:
+        consulta = filtro(consulta)
+    # Ordem estável por id para as faixas não se sobreporem
+    return consulta.order("id").range(inicio, inicio + tamanho - 1).execute().data or []
+
+
+def buscar_paginas(cliente, tabela, colunas=COLUNAS, tamanho=TAMANHO_PAGINA, max_conexoes=MAX_CONEXOES, filtro=None):
+    """Lista de páginas (listas de dicts) com todas as linhas da tabela.
+
+    ``filtro`` recebe e devolve a consulta, para restringir as linhas (por
+    exemplo ``lambda q: q.gt("id", 100)``).
+    """
+    total = contar_linhas(cliente, tabela, filtro)
+    if total is None:
+        # Sem contagem, lê em sequência até aparecer uma página incompleta
+        paginas = []
+        while True:
+            pagina = buscar_pagina(cliente, tabela, colunas, len(paginas) * tamanho, tamanho, filtro)
+            paginas.append(pagina)
+            if len(pagina) < tamanho:
+                return paginas
+    if total == 0:
+        return []
+
+    inicios = range(0, total, tamanho)
+    if len(inicios) == 1:
+        return [buscar_pagina(cliente, tabela, colunas, 0, tamanho, filtro)]
+    with ThreadPoolExecutor(max_workers=min(max_conexoes, len(inicios))) as executor:
+        return list(executor.map(lambda inicio: buscar_pagina(cliente, tabela, colunas, inicio, tamanho, filtro), inicios))
+
+
+def carregar_tabela(cliente, tabela, colunas=COLUNAS, **opcoes):
+    paginas = buscar_paginas(cliente, tabela, colunas, **opcoes)
+    return pd.DataFrame.from_records(chain.from_iterable(paginas), columns=colunas)
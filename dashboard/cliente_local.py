@@ -0,0 +1,112 @@
+"""Substituto local, em memória, do cliente do Supabase.
+
+Implementa só a parte da API de consultas que ``carregamento.py`` usa
+(``select`` com ou sem contagem, ``gt``, ``order`` e ``range``), com o mesmo
+corte de ``max-rows`` do PostgREST. Cada ``execute`` fica registrado em
+``consultas``, para conferir quantas requisições uma leitura fez::
+
+    cliente = ClienteLocal({"registros": gerar_registros(2500)})
+    df = carregar_tabela(cliente, "registros")
+    cliente.contar("pagina")  # 3
+"""
+import threading
+from typing import NamedTuple
+
+MAX_LINHAS = 1000
+OPERADORAS = ["Claro", "Vivo", "TIM", "Oi"]
+
+
+class Resposta(NamedTuple):
+    data: list
+    count: int | None
+
+
+def gerar_registros(quantidade: int, primeiro_id: int = 1) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "mes": f"2024-{i % 12 + 1:02d}",
+            "operadora": OPERADORAS[i % len(OPERADORAS)],
+            "circuito": f"C{i:06d}",
+            "desconto": round(i * 0.5, 2),
+        }
+        for i in range(primeiro_id, primeiro_id + quantidade)
+    ]
+
+
+class ConsultaLocal:
+
+    def __init__(self, cliente: "ClienteLocal", tabela: str):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.colunas = ()
+        self.contagem = False
+        self.so_cabecalho = False
+        self.filtros = []
+        self.ordem = []
+        self.faixa = None
+
+    def select(self, *colunas, count=None, head=False):
+        self.colunas = colunas
+        self.contagem = count == "exact"
+        self.so_cabecalho = head
+        return self
+
+    def gt(self, coluna, valor):
+        self.filtros.append(lambda linha: linha[coluna] is not None and linha[coluna] > valor)
+        return self
+
+    def order(self, coluna, desc=False):
+        self.ordem.append((coluna, desc))
+        return self
+
+    def range(self, inicio, fim):
+        self.faixa = (inicio, fim)
+        return self
+
+    def execute(self) -> Resposta:
+        self.cliente._registrar(self.tabela, "contagem" if self.so_cabecalho else "pagina")
+        linhas = [linha for linha in self.cliente.tabelas.get(self.tabela, []) if all(f(linha) for f in self.filtros)]
+        total = len(linhas) if self.contagem and self.cliente.contagem else None
+        if self.so_cabecalho:
+            return Resposta([], total)
+        for coluna, desc in reversed(self.ordem):
+            linhas = sorted(linhas, key=lambda linha: linha[coluna], reverse=desc)
+        inicio, fim = self.faixa if self.faixa is not None else (0, len(linhas) - 1)
+        # Como o PostgREST: nunca mais que max-rows linhas por resposta
+        linhas = linhas[inicio:min(fim + 1, inicio + self.cliente.max_linhas)]
+        if self.colunas and self.colunas != ("*",):
+            linhas = [{col: linha[col] for col in self.colunas} for linha in linhas]
+        else:
+            linhas = [dict(linha) for linha in linhas]
+        return Resposta(linhas, total)
+
+
+class ClienteLocal:
+    """Tabelas em memória (listas de dicts) atrás da API de consultas do Supabase.
+
+    ``contagem=False`` simula um servidor que não devolve o ``count``.
+    """
+
+    def __init__(self, tabelas: dict | None = None, max_linhas: int = MAX_LINHAS, contagem: bool = True):
+        self.tabelas = tabelas if tabelas is not None else {}
+        self.max_linhas = max_linhas
+        self.contagem = contagem
+        self.consultas: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def table(self, nome: str) -> ConsultaLocal:
+        return ConsultaLocal(self, nome)
+
+    def _registrar(self, tabela: str, tipo: str):
+        # As páginas são buscadas em paralelo
+        with self._lock:
+            self.consultas.append((tabela, tipo))
+
+    def contar(self, tipo: str) -> int:
+        with self._lock:
+            return sum(1 for _, feito in self.consultas if feito == tipo)
+
+    def zerar_consultas(self):
+        with self._lock:
+            self.consultas.clear()
@@ -0,0 +1,95 @@
+"""Consultas agregadas dos registros, executadas no banco.
+
+Os KPIs e os gráficos do dashboard só precisam de somas por operadora e por
+mês, da contagem de registros e do número de operadoras; calcular isso no
+banco evita trazer a tabela inteira para o pandas a cada filtro.
+
+As funções ``*_sqlite`` rodam sobre uma conexão SQLite (o backend local e o
+espelho do Supabase). No Supabase as mesmas consultas ficam nas funções de
+``sql/resumo_registros.sql``, chamadas por RPC, e o JSON devolvido é
+convertido pelas funções ``*_json``.
+"""
+from typing import NamedTuple
+
+import pandas as pd
+
+from carregamento import COLUNAS
+
+
+class Opcoes(NamedTuple):
+    meses: list
+    operadoras: list
+    registros: int
+
+
+class Resumo(NamedTuple):
+    total: float
+    registros: int
+    operadoras: int
+    por_operadora: pd.DataFrame  # operadora, desconto
+    por_mes: pd.DataFrame  # mes_dt, desconto
+
+
+def _where(mes=None, operadora=None):
+    condicoes, parametros = [], []
+    if mes is not None:
+        condicoes.append("mes = ?")
+        parametros.append(mes)
+    if operadora is not None:
+        condicoes.append("operadora = ?")
+        parametros.append(operadora)
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+
+def _por_mes(por_mes: pd.DataFrame) -> pd.DataFrame:
+    # Meses fora do formato aaaa-mm ficam fora do gráfico, como antes
+    por_mes = por_mes.assign(mes_dt=pd.to_datetime(por_mes["mes"], format="%Y-%m", errors="coerce"))
+    por_mes = por_mes.dropna(subset=["mes_dt"])
+    return por_mes.groupby("mes_dt", as_index=False)["desconto"].sum()
+
+
+def opcoes_sqlite(con, tabela) -> Opcoes:
+    meses = [mes for (mes,) in con.execute(f"SELECT DISTINCT mes FROM {tabela} WHERE mes IS NOT NULL ORDER BY mes")]
+    operadoras = [op for (op,) in con.execute(
+        f"SELECT DISTINCT operadora FROM {tabela} WHERE operadora IS NOT NULL ORDER BY operadora"
+    )]
+    (registros,) = con.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()
+    return Opcoes(meses, operadoras, registros)
+
+
+def resumir_sqlite(con, tabela, mes=None, operadora=None) -> Resumo:
+    where, parametros = _where(mes, operadora)
+    total, registros, operadoras = con.execute(
+        f"SELECT COALESCE(SUM(desconto), 0), COUNT(*), COUNT(DISTINCT operadora) FROM {tabela}{where}", parametros
+    ).fetchone()
+    filtro_operadora = (where + " AND" if where else " WHERE") + " operadora IS NOT NULL"
+    por_operadora = pd.read_sql_query(
+        f"SELECT operadora, COALESCE(SUM(desconto), 0) AS desconto FROM {tabela}{filtro_operadora} "
+        "GROUP BY operadora ORDER BY operadora",
+        con, params=parametros,
+    )
+    por_mes = pd.read_sql_query(
+        f"SELECT mes, COALESCE(SUM(desconto), 0) AS desconto FROM {tabela}{where} GROUP BY mes", con, params=parametros
+    )
+    return Resumo(float(total), registros, operadoras, por_operadora, _por_mes(por_mes))
+
+
+def listar_sqlite(con, tabela, mes=None, operadora=None, inicio=0, limite=None, decrescente=True) -> pd.DataFrame:
+    where, parametros = _where(mes, operadora)
+    # aaaa-mm ordena como data; meses vazios vão para o fim, e o id desempata
+    direcao = "DESC" if decrescente else "ASC"
+    ordem = f" ORDER BY mes IS NULL, mes {direcao}, id"
+    return pd.read_sql_query(
+        f"SELECT {', '.join(COLUNAS)} FROM {tabela}{where}{ordem} LIMIT ? OFFSET ?",
+        con, params=[*parametros, -1 if limite is None else limite, inicio],
+    )
+
+
+def opcoes_json(dados: dict) -> Opcoes:
+    return Opcoes(dados["meses"] or [], dados["operadoras"] or [], dados["registros"])
+
+
+def resumo_json(dados: dict) -> Resumo:
+    por_operadora = pd.DataFrame(dados["por_operadora"] or [], columns=["operadora", "desconto"])
+    por_mes = pd.DataFrame(dados["por_mes"] or [], columns=["mes", "desconto"])
+    return Resumo(float(dados["total"]), dados["registros"], dados["operadoras"], por_operadora, _por_mes(por_mes))
@@ -0,0 +1,114 @@
+"""Espelho local (SQLite) da tabela de registros.
+
+Evita ler a tabela inteira do Supabase a cada rerun do Streamlit:
+
+* dentro de ``intervalo_sync`` segundos desde a última sincronização, o
+  dashboard lê só o SQLite local;
+* depois disso busca apenas as linhas com ``id`` acima do último checkpoint
+  (os registros não são editados, só incluídos e excluídos);
+* a cada ``ttl_completo`` segundos (ou se o espelho estiver vazio) recarrega
+  tudo, o que também captura exclusões feitas fora deste app;
+* inclusões e exclusões feitas pelo próprio app são aplicadas direto no
+  espelho, sem nova leitura.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from carregamento import COLUNAS, buscar_paginas
+from instrumentacao import etapa
+
+INTERVALO_SYNC = 60
+TTL_COMPLETO = 60 * 60
+
+
+class EspelhoLocal:
+
+    def __init__(self, caminho, tabela="registros", intervalo_sync=INTERVALO_SYNC, ttl_completo=TTL_COMPLETO):
+        self.caminho = Path(caminho)
+        self.tabela = tabela
+        self.intervalo_sync = intervalo_sync
+        self.ttl_completo = ttl_completo
+        self._lock = threading.Lock()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self.conectar() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS registros "
+                "(id INTEGER PRIMARY KEY, mes TEXT, operadora TEXT, circuito TEXT, desconto REAL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_registros_mes ON registros (mes)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_registros_operadora ON registros (operadora)")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor REAL)")
+
+    @contextmanager
+    def conectar(self):
+        # Uma conexão por operação: o Streamlit atende sessões em threads diferentes
+        con = sqlite3.connect(self.caminho)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _meta(self, con, chave, padrao=0.0):
+        linha = con.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+
+    def _gravar_meta(self, con, **valores):
+        con.executemany("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", valores.items())
+
+    def _gravar_linhas(self, con, linhas):
+        con.executemany(
+            "INSERT OR REPLACE INTO registros (id, mes, operadora, circuito, desconto) "
+            "VALUES (:id, :mes, :operadora, :circuito, :desconto)",
+            ({col: linha.get(col) for col in COLUNAS} for linha in linhas),
+        )
+
+    def sincronizar(self, cliente, forcar_completo=False) -> str:
+        """Atualiza o espelho se preciso; devolve "nenhuma", "delta" ou "completa"."""
+        with self._lock:
+            agora = time.time()
+            with self.conectar() as con:
+                ultimo_sync = self._meta(con, "ultimo_sync")
+                ultima_completa = self._meta(con, "ultima_completa")
+                checkpoint = int(self._meta(con, "checkpoint_id"))
+            completa = forcar_completo or not ultima_completa or agora - ultima_completa > self.ttl_completo
+            if not completa and agora - ultimo_sync < self.intervalo_sync:
+                return "nenhuma"
+
+            with etapa("supabase_sync_completa" if completa else "supabase_sync_delta") as registro:
+                if completa:
+                    paginas = buscar_paginas(cliente, self.tabela, COLUNAS)
+                else:
+                    paginas = buscar_paginas(cliente, self.tabela, COLUNAS, filtro=lambda q: q.gt("id", checkpoint))
+                linhas = [linha for pagina in paginas for linha in pagina]
+                registro.linhas = len(linhas)
+            novo_checkpoint = max((linha["id"] for linha in linhas), default=checkpoint)
+
+            with self.conectar() as con:
+                if completa:
+                    con.execute("DELETE FROM registros")
+                self._gravar_linhas(con, linhas)
+                meta = {"ultimo_sync": agora, "checkpoint_id": novo_checkpoint}
+                if completa:
+                    meta["ultima_completa"] = agora
+                self._gravar_meta(con, **meta)
+            return "completa" if completa else "delta"
+
+    def carregar(self) -> pd.DataFrame:
+        with self.conectar() as con:
+            return pd.read_sql_query("SELECT id, mes, operadora, circuito, desconto FROM registros", con)
+
+    def aplicar_insercao(self, linhas):
+        # O checkpoint não avança aqui: linhas de outros usuários com id
+        # menor ainda precisam vir na próxima sincronização
+        with self._lock, self.conectar() as con:
+            self._gravar_linhas(con, linhas)
+
+    def aplicar_exclusao(self, ids):
+        with self._lock, self.conectar() as con:
+            con.executemany("DELETE FROM registros WHERE id = ?", ((int(i),) for i in ids))
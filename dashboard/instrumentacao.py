@@ -0,0 +1,158 @@
+"""Instrumentação opcional das etapas de um rerun.
+
+Desligada por padrão. Liga com ``DESEMPENHO_PAINEL=1`` (ou ``?debug=1`` na
+URL, decidido pelo app), que mostra o painel na barra lateral, e/ou com
+``DESEMPENHO_LOG=<arquivo.jsonl>``, que grava uma linha JSON por rerun com o
+tempo e o número de linhas de cada etapa. O pico de memória de cada etapa
+é opcional à parte (``DESEMPENHO_MEMORIA=1``), porque o ``tracemalloc``
+deixa o processo inteiro várias vezes mais lento enquanto está ligado.
+
+O código instrumentado usa ``etapa(nome)``, que mede no ``Medidor`` ativo
+da thread do rerun e não faz nada quando não há medidor ligado::
+
+    with etapa("supabase_sync") as registro:
+        linhas = buscar(...)
+        registro.linhas = len(linhas)
+
+O ``tracemalloc`` é global ao processo: fica ligado só enquanto alguma etapa
+com memória está rodando (e é desligado no ``finally`` da etapa, mesmo que o
+rerun falhe) e, com várias sessões ao mesmo tempo, o pico inclui as
+alocações das outras.
+
+Mesma interface de ``chamados/instrumentacao.py``; fica duplicado aqui
+porque este app é implantado sozinho, só com a pasta ``dashboard/``.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pandas as pd
+
+_medidor_atual = ContextVar("medidor_atual", default=None)
+_lock_tracemalloc = threading.Lock()
+_etapas_com_memoria = 0
+_ligou_tracemalloc = False
+
+
+@dataclass
+class Etapa:
+    nome: str
+    segundos: float = 0.0
+    pico_mb: float | None = None
+    linhas: int | None = None
+
+
+@contextmanager
+def _rastreando_memoria():
+    """Mantém o ``tracemalloc`` ligado enquanto houver etapa medindo memória."""
+    global _etapas_com_memoria, _ligou_tracemalloc
+    with _lock_tracemalloc:
+        if _etapas_com_memoria == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _ligou_tracemalloc = True
+        _etapas_com_memoria += 1
+    try:
+        yield
+    finally:
+        with _lock_tracemalloc:
+            _etapas_com_memoria -= 1
+            # Só desliga se foi ligado aqui (não atrapalha quem já rastreava)
+            if _etapas_com_memoria == 0 and _ligou_tracemalloc:
+                tracemalloc.stop()
+                _ligou_tracemalloc = False
+
+
+class Medidor:
+    """Coleta as etapas de um rerun e as mostra/grava no final."""
+
+    def __init__(self, app: str, painel: bool = False, arquivo_log=None, memoria: bool = False):
+        self.app = app
+        self.painel = painel
+        self.arquivo_log = Path(arquivo_log) if arquivo_log else None
+        self.ativo = painel or self.arquivo_log is not None
+        self.memoria = self.ativo and memoria
+        self.etapas: list[Etapa] = []
+        self._inicio = time.perf_counter()
+        self._pilha = []
+        _medidor_atual.set(self if self.ativo else None)
+
+    @classmethod
+    def do_ambiente(cls, app: str, painel: bool = False) -> "Medidor":
+        painel = painel or os.environ.get("DESEMPENHO_PAINEL") == "1"
+        return cls(app, painel, os.environ.get("DESEMPENHO_LOG"), os.environ.get("DESEMPENHO_MEMORIA") == "1")
+
+    @contextmanager
+    def etapa(self, nome: str):
+        registro = Etapa(nome)
+        if not self.ativo:
+            yield registro
+            return
+        with _rastreando_memoria() if self.memoria else nullcontext():
+            rastreando = self.memoria and tracemalloc.is_tracing()
+            if rastreando:
+                # reset_peak zera o pico das etapas externas; cada nível guarda o
+                # maior pico das internas para não subestimar o próprio
+                self._pilha.append([tracemalloc.get_traced_memory()[0], 0])
+                tracemalloc.reset_peak()
+            inicio = time.perf_counter()
+            try:
+                yield registro
+            finally:
+                registro.segundos = time.perf_counter() - inicio
+                if rastreando:
+                    atual, pico_internas = self._pilha.pop()
+                    # Outra sessão pode ter desligado o tracemalloc no meio da etapa
+                    if tracemalloc.is_tracing():
+                        pico = max(tracemalloc.get_traced_memory()[1], pico_internas)
+                        registro.pico_mb = (pico - atual) / 1024**2
+                        if self._pilha:
+                            self._pilha[-1][1] = max(self._pilha[-1][1], pico)
+                self.etapas.append(registro)
+
+    def tabela(self) -> pd.DataFrame:
+        tabela = pd.DataFrame([asdict(e) for e in self.etapas], columns=["nome", "segundos", "pico_mb", "linhas"])
+        return tabela.rename(columns={"nome": "Etapa", "segundos": "Tempo (s)", "pico_mb": "Pico (MB)", "linhas": "Linhas"})
+
+    def gravar_log(self, **extras):
+        """Acrescenta uma linha JSON com as etapas medidas até agora e as esvazia."""
+        if self.arquivo_log is None or not self.etapas:
+            return
+        registro = {
+            "momento": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "app": self.app,
+            "total_s": round(time.perf_counter() - self._inicio, 4),
+            "etapas": [asdict(e) for e in self.etapas],
+            **extras,
+        }
+        self.arquivo_log.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.arquivo_log, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.etapas = []
+
+    def finalizar(self, container=None, **extras):
+        """Mostra o painel em ``container`` (ex.: ``st.sidebar``) e grava o log."""
+        if not self.ativo:
+            return
+        if self.painel and container is not None:
+            painel = container.expander("🩺 Desempenho do rerun", expanded=True)
+            painel.caption(f"Rerun: {time.perf_counter() - self._inicio:.3f}s")
+            tabela = self.tabela()
+            painel.dataframe(tabela if self.memoria else tabela.drop(columns="Pico (MB)"), hide_index=True)
+        self.gravar_log(**extras)
+
+
+@contextmanager
+def etapa(nome: str):
+    """Mede ``nome`` no medidor ativo desta thread, se houver."""
+    medidor = _medidor_atual.get()
+    if medidor is None:
+        yield Etapa(nome)
+        return
+    with medidor.etapa(nome) as registro:
+        yield registro
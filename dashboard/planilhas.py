@@ -0,0 +1,179 @@
+"""Importação e exportação de registros em planilha.
+
+A importação aceita CSV ou XLSX com as colunas Mes, Operadora, Circuito e
+Desconto (o mesmo formato exportado pelo ``index.html``), valida todas as
+linhas de uma vez com operações vetorizadas e grava em lotes, com novas
+tentativas quando um lote falha.
+
+A exportação escreve o XLSX página a página no modo ``constant_memory`` do
+xlsxwriter, em um arquivo temporário que só vai para o disco quando passa
+de ``LIMITE_MEMORIA``, então a tabela nunca fica inteira na memória como
+DataFrame. O arquivo pronto volta como ``bytes``, porque o Streamlit guarda
+o download inteiro em memória de qualquer forma.
+"""
+import io
+import tempfile
+import time
+import unicodedata
+from typing import NamedTuple
+
+import pandas as pd
+
+CAMPOS = ["mes", "operadora", "circuito", "desconto"]
+# Cabeçalhos aceitos, já sem acentos e em minúsculas
+APELIDOS = {
+    "mes": "mes", "mes/ano": "mes", "competencia": "mes",
+    "operadora": "operadora",
+    "circuito": "circuito",
+    "desconto": "desconto", "desconto (r$)": "desconto", "valor": "desconto", "valor (r$)": "desconto",
+}
+FORMATOS_MES = ["%Y-%m", "%m/%Y", "%Y-%m-%d", "%d/%m/%Y"]
+TAMANHO_LOTE = 500
+TENTATIVAS = 3
+ESPERA_INICIAL = 0.5
+TAMANHO_PAGINA_EXPORTACAO = 5000
+LIMITE_MEMORIA = 32 * 1024 * 1024
+
+
+class Validacao(NamedTuple):
+    validos: pd.DataFrame  # colunas de CAMPOS, prontas para inserir
+    erros: pd.DataFrame  # Linha (da planilha) e Motivo
+
+
+def _normalizar_cabecalho(nome) -> str:
+    sem_acento = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.lower().split())
+
+
+def ler_planilha(nome: str, conteudo: bytes) -> pd.DataFrame:
+    if nome.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(io.BytesIO(conteudo))
+    else:
+        try:
+            texto = conteudo.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            texto = conteudo.decode("latin1")
+        cabecalho = texto.split("\n", 1)[0]
+        sep = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+        df = pd.read_csv(io.StringIO(texto), sep=sep, dtype=str)
+    return df.rename(columns=lambda col: APELIDOS.get(_normalizar_cabecalho(col), col))
+
+
+def _texto(coluna: pd.Series) -> pd.Series:
+    return coluna.astype(object).where(coluna.notna(), "").astype(str).str.strip()
+
+
+def _mes(coluna: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(coluna):
+        datas = coluna
+    else:
+        texto = _texto(coluna)
+        datas = pd.Series(pd.NaT, index=coluna.index, dtype="datetime64[ns]")
+        for formato in FORMATOS_MES:
+            faltando = datas.isna()
+            if not faltando.any():
+                break
+            datas[faltando] = pd.to_datetime(texto[faltando], format=formato, errors="coerce")
+    return datas.dt.strftime("%Y-%m")
+
+
+def _desconto(coluna: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(coluna):
+        return coluna.astype(float)
+    texto = _texto(coluna).str.replace("R$", "", regex=False).str.replace(" ", "", regex=False)
+    virgula, ponto = texto.str.rfind(","), texto.str.rfind(".")
+    # 1.234,56 (vírgula como último separador, padrão brasileiro) vira 1234.56;
+    # 1234.56 fica como está
+    brasileiro = virgula > ponto
+    texto = texto.where(~brasileiro, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    # 1,234.56 é ambíguo aqui: vira inválido em vez de um valor errado
+    ambiguo = (virgula >= 0) & (ponto > virgula)
+    return pd.to_numeric(texto.where(~ambiguo), errors="coerce")
+
+
+def validar(df: pd.DataFrame) -> Validacao:
+    """Separa as linhas válidas das inválidas, sem laço por linha."""
+    faltando = [campo for campo in CAMPOS if campo not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na planilha: {', '.join(faltando)}.")
+
+    limpo = pd.DataFrame({
+        "mes": _mes(df["mes"]),
+        "operadora": _texto(df["operadora"]),
+        "circuito": _texto(df["circuito"]),
+        "desconto": _desconto(df["desconto"]),
+    })
+    problemas = {
+        "mês inválido": limpo["mes"].isna(),
+        "operadora vazia": limpo["operadora"] == "",
+        "circuito vazio": limpo["circuito"] == "",
+        "desconto inválido": limpo["desconto"].isna() | (limpo["desconto"] < 0),
+    }
+    motivos = pd.Series("", index=df.index)
+    for motivo, falhou in problemas.items():
+        motivos = motivos.where(~falhou, motivos + "; " + motivo)
+    invalido = motivos != ""
+
+    erros = pd.DataFrame({
+        # +2: cabeçalho e numeração a partir de 1, como no Excel
+        "Linha": df.index[invalido] + 2,
+        "Motivo": motivos[invalido].str.lstrip("; ").to_numpy(),
+    })
+    return Validacao(limpo[~invalido].reset_index(drop=True), erros)
+
+
+def _com_tentativas(acao, tentativas=TENTATIVAS, espera=ESPERA_INICIAL):
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return acao()
+        except Exception:
+            if tentativa == tentativas:
+                raise
+            time.sleep(espera * 2 ** (tentativa - 1))
+
+
+def importar(armazenamento, validos: pd.DataFrame, tamanho_lote=TAMANHO_LOTE, tentativas=TENTATIVAS, progresso=None) -> int:
+    """Grava as linhas validadas em lotes; devolve quantas foram salvas.
+
+    ``progresso(feitos, total)`` é chamado a cada lote. Um lote que falha é
+    repetido com espera crescente; se a falha aconteceu depois da gravação
+    (resposta perdida), a nova tentativa pode duplicar o lote.
+    """
+    linhas = validos[CAMPOS].to_dict("records")
+    salvas = 0
+    for inicio in range(0, len(linhas), tamanho_lote):
+        lote = linhas[inicio:inicio + tamanho_lote]
+        salvas += len(_com_tentativas(lambda: armazenamento.inserir(lote), tentativas))
+        if progresso is not None:
+            progresso(inicio + len(lote), len(linhas))
+    return salvas
+
+
+def exportar_xlsx(armazenamento, mes=None, operadora=None, tamanho_pagina=TAMANHO_PAGINA_EXPORTACAO) -> bytes:
+    """XLSX com os registros filtrados, pronto para o ``st.download_button``."""
+    import xlsxwriter
+
+    with tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA) as arquivo:
+        with xlsxwriter.Workbook(arquivo, {"constant_memory": True}) as workbook:
+            planilha = workbook.add_worksheet("Registros")
+            negrito = workbook.add_format({"bold": True})
+            moeda = workbook.add_format({"num_format": "#,##0.00"})
+            planilha.write_row(0, 0, ["Mes", "Operadora", "Circuito", "Desconto"], negrito)
+            planilha.set_column(0, 2, 18)
+            planilha.set_column(3, 3, 14)
+
+            linha = 1
+            while True:
+                # O backend pode devolver menos linhas que o pedido (limite do PostgREST)
+                pagina = armazenamento.listar(mes, operadora, inicio=linha - 1, limite=tamanho_pagina, decrescente=False)
+                if pagina.empty:
+                    break
+                textos = pagina[["mes", "operadora", "circuito"]].astype(object).fillna("").astype(str)
+                for valores, desconto in zip(textos.itertuples(index=False), pagina["desconto"]):
+                    # constant_memory exige escrever as linhas em ordem
+                    planilha.write_row(linha, 0, valores)
+                    if pd.notna(desconto):
+                        planilha.write_number(linha, 3, desconto, moeda)
+                    linha += 1
+        arquivo.seek(0)
+        return arquivo.read()
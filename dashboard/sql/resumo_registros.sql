@@ -0,0 +1,45 @@
+-- Agregações usadas pelo dashboard de operadoras (ver dashboard/consultas.py).
+-- Rodar uma vez no SQL Editor do Supabase; depois usar RESUMO_REGISTROS=rpc
+-- (ou resumo = "rpc" na seção [armazenamento] do secrets.toml).
+
+create index if not exists idx_registros_mes on registros (mes);
+create index if not exists idx_registros_operadora on registros (operadora);
+
+create or replace function opcoes_registros()
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'meses', (select json_agg(mes order by mes) from (select distinct mes from registros where mes is not null) m),
+    'operadoras', (select json_agg(operadora order by operadora)
+                   from (select distinct operadora from registros where operadora is not null) o),
+    'registros', (select count(*) from registros)
+  );
+$$;
+
+create or replace function resumo_registros(p_mes text default null, p_operadora text default null)
+returns json
+language sql
+stable
+as $$
+  with filtrado as (
+    select mes, operadora, desconto
+    from registros
+    where (p_mes is null or mes = p_mes)
+      and (p_operadora is null or operadora = p_operadora)
+  )
+  select json_build_object(
+    'total', (select coalesce(sum(desconto), 0) from filtrado),
+    'registros', (select count(*) from filtrado),
+    'operadoras', (select count(distinct operadora) from filtrado),
+    'por_operadora', (select json_agg(t order by t.operadora)
+                      from (select operadora, coalesce(sum(desconto), 0) as desconto
+                            from filtrado where operadora is not null group by operadora) t),
+    'por_mes', (select json_agg(t)
+                from (select mes, coalesce(sum(desconto), 0) as desconto from filtrado group by mes) t)
+  );
+$$;
+
+grant execute on function opcoes_registros() to anon, authenticated;
+grant execute on function resumo_registros(text, text) to anon, authenticated;
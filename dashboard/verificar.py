@@ -0,0 +1,100 @@
+"""Verificações rápidas da leitura paginada e do espelho local contra o ``ClienteLocal``.
+
+Não precisam de rede nem de credenciais do Supabase. Rodar dentro de
+``dashboard/``::
+
+    python verificar.py
+
+Sai com código 1 se alguma verificação falhar, para poder rodar na CI.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from carregamento import COLUNAS, carregar_tabela
+from cliente_local import ClienteLocal, gerar_registros
+from espelho import EspelhoLocal
+
+
+def verificar_carregamento() -> list[str]:
+    problemas = []
+
+    # 2500 linhas em páginas de 1000: uma contagem e 3 páginas
+    cliente = ClienteLocal({"registros": gerar_registros(2500)})
+    df = carregar_tabela(cliente, "registros")
+    if len(df) != 2500 or df["id"].nunique() != 2500:
+        problemas.append(f"carregamento: {len(df)} linhas ({df['id'].nunique()} ids distintos), esperado 2500")
+    if list(df.columns) != COLUNAS:
+        problemas.append(f"carregamento: colunas {list(df.columns)}")
+    if (cliente.contar("contagem"), cliente.contar("pagina")) != (1, 3):
+        problemas.append(f"carregamento: {cliente.contar('contagem')} contagens e {cliente.contar('pagina')} páginas, esperado 1 e 3")
+
+    # Sem count, lê em sequência até a página incompleta
+    cliente = ClienteLocal({"registros": gerar_registros(2500)}, contagem=False)
+    df = carregar_tabela(cliente, "registros")
+    if len(df) != 2500 or cliente.contar("pagina") != 3:
+        problemas.append(f"carregamento sem count: {len(df)} linhas em {cliente.contar('pagina')} páginas, esperado 2500 em 3")
+
+    # Tabela vazia: só a contagem, DataFrame vazio com as colunas certas
+    cliente = ClienteLocal({"registros": []})
+    df = carregar_tabela(cliente, "registros")
+    if not df.empty or list(df.columns) != COLUNAS or cliente.contar("pagina") != 0:
+        problemas.append("carregamento de tabela vazia")
+    return problemas
+
+
+def verificar_espelho() -> list[str]:
+    problemas = []
+    cliente = ClienteLocal({"registros": gerar_registros(2500)})
+    with tempfile.TemporaryDirectory() as pasta:
+        espelho = EspelhoLocal(Path(pasta) / "espelho.sqlite", intervalo_sync=0)
+
+        # Espelho vazio: carga completa em 3 páginas
+        modo = espelho.sincronizar(cliente)
+        if modo != "completa" or len(espelho.carregar()) != 2500 or cliente.contar("pagina") != 3:
+            problemas.append(f"espelho: 1ª sincronização {modo!r}, {len(espelho.carregar())} linhas em {cliente.contar('pagina')} páginas")
+
+        # Linhas novas no servidor: o delta busca só o que passou do checkpoint
+        cliente.tabelas["registros"] += gerar_registros(150, primeiro_id=2501)
+        cliente.zerar_consultas()
+        modo = espelho.sincronizar(cliente)
+        if modo != "delta" or len(espelho.carregar()) != 2650 or cliente.contar("pagina") != 1:
+            problemas.append(f"espelho: delta {modo!r}, {len(espelho.carregar())} linhas em {cliente.contar('pagina')} páginas")
+
+        # Dentro do intervalo de sincronização não há requisição nenhuma
+        espelho.intervalo_sync = 3600
+        cliente.zerar_consultas()
+        modo = espelho.sincronizar(cliente)
+        if modo != "nenhuma" or cliente.consultas:
+            problemas.append(f"espelho: dentro do intervalo {modo!r} com {len(cliente.consultas)} requisições")
+
+        # Exclusão feita fora do app: o delta não vê, a carga completa sim
+        cliente.tabelas["registros"] = [linha for linha in cliente.tabelas["registros"] if linha["id"] > 100]
+        modo = espelho.sincronizar(cliente, forcar_completo=True)
+        ids = espelho.carregar()["id"]
+        if modo != "completa" or len(ids) != 2550 or ids.min() != 101:
+            problemas.append(f"espelho: carga completa {modo!r} com {len(ids)} linhas")
+
+        # Inclusões e exclusões do próprio app vão direto para o espelho
+        espelho.aplicar_insercao(gerar_registros(1, primeiro_id=9999))
+        espelho.aplicar_exclusao([101, 102])
+        ids = set(espelho.carregar()["id"])
+        if 9999 not in ids or {101, 102} & ids or len(ids) != 2549:
+            problemas.append("espelho: inclusão/exclusão locais")
+    return problemas
+
+
+VERIFICACOES = [verificar_carregamento, verificar_espelho]
+
+
+def main() -> int:
+    problemas = [problema for verificacao in VERIFICACOES for problema in verificacao()]
+    for problema in problemas:
+        print("FALHOU", problema, file=sys.stderr)
+    if not problemas:
+        print(f"ok ({len(VERIFICACOES)} verificações)")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())